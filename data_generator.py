@@ -4,9 +4,12 @@ to have enough data with which to write regex tests. Output will be saved to sit
 
 (Before running first set up the message broker (e.g. Redis) in your .env file.)
 
-Then set up Celery worker to run file:
+Then set up Celery worker:
 $ celery -A data_generator worker -P eventlet --concurrency 100
 
+And send tasks using:
+$ python data_generator.py
+
 $ celery -A data_generator purge 
 can be used to discontinue any messages if previous worker interrupted before finishing
 """
@@ -19,11 +22,6 @@ import requests
 import time
 
 
-# load data & drop rows with missing urls
-reader = pd.read_csv('sites_list/main.csv', encoding='utf-8', iterator=True)
-df = reader.get_chunk(100).dropna()
-
-
 # initiate celery instance
 app = Celery('data_generator', broker=config('BROKER_URL'))
 
@@ -105,20 +103,21 @@ completed = 0
 
 # define celery task to reduce scraping bottleneck (i.e. make each QuickScrape instance concurrent)
 # this effectively has runtime O(n) where n is the max number of secondary links for any site
+# row is a JSON encodable dict with 'id', 'name' & 'url' keys, total is the number of tasks sent
 @app.task
-def scrape(index):
-    href1 = df.iloc[index]['url']
+def scrape(row, total):
+    href1 = row['url']
     scraper = QuickScrape(href1)
     scraper.execute()
     global completed
     completed += 1
     # save in df if managed to get something
     if scraper.results:
-        id.append(df.iloc[index]['id'])
-        name.append(df.iloc[index]['name'])
+        id.append(row['id'])
+        name.append(row['name'])
         url.append(href1)
         content.append(scraper.results)
-    print(f"Completed: {href1}! ({completed}/{len(df)})")
+    print(f"Completed: {href1}! ({completed}/{total})")
     # this will slightly slow runtime but 80-20 approach for now
     # necessary to prevent celery from writing to file too early
     new_df = pd.DataFrame({'id':id, 'name':name, 'url':url, 'content':content})
@@ -128,10 +127,14 @@ def scrape(index):
 
 # output function
 def run():
-    for index in range(len(df)):
+    # load data & drop rows with missing urls
+    reader = pd.read_csv('sites_list/main.csv', encoding='utf-8', iterator=True)
+    df = reader.get_chunk(100).dropna()
+    for row in df.itertuples(index=False):
         # call delay to activate concurrency
-        scrape.delay(index)
+        scrape.delay({'id': int(row.id), 'name': row.name, 'url': row.url}, len(df))
 
 
-# run process when called in python
-run()
\ No newline at end of file
+# run process when called in python (not when imported by the worker)
+if __name__ == '__main__':
+    run()
\ No newline at end of file
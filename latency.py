@@ -0,0 +1,20 @@
+"""Summarises a latency export of scraper.metrics (METRICS_FILE in .env): count, mean and
+p50/p90/p99 of each phase & outcome, merged across all workers that wrote to the file.
+Percentiles are bucket upper bounds, so read them as 'at most'.
+
+Run using:
+$ python latency.py databases/metrics.jsonl
+"""
+
+import argparse
+from scraper.metrics import summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Summarise per-phase latency histograms.')
+    parser.add_argument('path')
+    args = parser.parse_args()
+    print(f"{'phase':<10}{'outcome':<11}{'count':>9}{'mean ms':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+    for row in summary(args.path):
+        ms = ''.join(f"{row[p] * 1000:>9.1f}" for p in ('p50', 'p90', 'p99'))
+        print(f"{row['phase']:<10}{row['outcome']:<11}{row['count']:>9}{row['mean'] * 1000:>10.1f}{ms}")
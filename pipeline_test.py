@@ -11,44 +11,51 @@ can be used to discontinue any messages if previous worker interrupted before fi
 """
 
 from scraper import Pipeline
-import pandas as pd
 from celery import Celery
 from decouple import config
 
 
-reader = pd.read_csv('sites_list/main.csv', encoding='utf-8', iterator=True)
-df = reader.get_chunk(100).dropna()
-
 # initiate celery instance
 app = Celery('pipeline_test', broker=config('BROKER_URL'))
 
-# initiate pipeline
-pipe = Pipeline()
+# pipeline is set up by the first task, not at import
+pipe = None
+
+
+def pipeline():
+    """Returns the worker's Pipeline, initiating it on first use."""
+    global pipe
+    if pipe is None:
+        pipe = Pipeline()
+    return pipe
 
 # counter for completion (takes into account for bad requests)
 completed = 0
 
 # define celery task
+# row is a JSON encodable dict with 'id', 'name' & 'url' keys, total is the number of tasks sent
 @app.task
-def scrape(index):
-    row = df.iloc[index]
-    pipe.etl(
+def scrape(row, total):
+    pipeline().etl(
         row['url'], 
         id=int(row['id']),
         name=row['name']
         )
     global completed
     completed += 1
-    print(f"Completed: {row['url']} ({completed}/{len(df)})")
-    if completed == len(df):
+    print(f"Completed: {row['url']} ({completed}/{total})")
+    if completed == total:
         # save to csv
-        pipe.yeet('sites_data/pipeline_test.csv')
+        pipeline().yeet('sites_data/pipeline_test.csv')
         print("ALL FINISHED!")
     return
 
 
 # output function
 def run():
-    for index in range(len(df)):
+    import pandas as pd
+    reader = pd.read_csv('sites_list/main.csv', encoding='utf-8', iterator=True)
+    df = reader.get_chunk(100).dropna()
+    for row in df.itertuples(index=False):
         # call delay to activate concurrency
-        scrape.delay(index)
\ No newline at end of file
+        scrape.delay({'id': int(row.id), 'name': row.name, 'url': row.url}, len(df))
\ No newline at end of file
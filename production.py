@@ -1,12 +1,13 @@
-"""Final production file of the scraper for input size of around 48,000. 
+"""Final production file of the scraper for input size of around 48,000.
 It will save to sqlite3 then pull to csv at sites_data/final.csv.
 
-(Before running first set up the message broker (e.g. Redis) in your .env file.)
+(Before running first set up the message broker (e.g. Redis) in your .env file.
+The number of worker queues can be set with SHARDS in .env, default is 4.)
 
 Set up Celery flower to view running tasks:
 $ celery -A production flower
 
-Then set up Celery workers:
+Then set up one Celery worker per shard (worker1 to workerN):
 $ celery -A production worker -P eventlet -c 12000 -n worker1 -Q worker1
 $ celery -A production worker -P eventlet -c 12000 -n worker2 -Q worker2
 $ celery -A production worker -P eventlet -c 12000 -n worker3 -Q worker3
@@ -14,39 +15,49 @@ $ celery -A production worker -P eventlet -c 12000 -n worker4 -Q worker4
 
 Check all workers are online before finally:
 $ python run_production.py
+
+Sites are sent in messages of BATCH sites (set in .env, default 50), which each worker crawls
+concurrently, so broker & serialization overhead is shared between the sites of a message.
+Sites are routed to queues by a hash of their host, so every site of a host lands on the same
+worker and shares its per-host cooldowns. Each task message carries its own row, so workers
+never load the input file. Importing this module only defines the app & tasks (input loading,
+database setup and enqueueing wait for run() or the first task), which can be checked with:
+$ python -m speed_tests.import_bench
 """
 
-from scraper import Pipeline
-import pandas as pd
+from scraper import Neo, Pipeline, HostScheduler
 from celery import Celery
 from decouple import config
-import csv
-import math
+import zlib
 
 
 # define input file target (for debug function use sites_list/debug.csv)
 file = 'sites_list/main.csv'
 
+# number of worker queues to split sites between
+SHARDS = config('SHARDS', default=4, cast=int)
+# number of sites per task message (crawled concurrently by the worker)
+BATCH = config('BATCH', default=50, cast=int)
+
 # initiate celery instance
 app = Celery('production', broker=config('BROKER_URL'))
 
-# initiate pipeline
-pipe = Pipeline()
+# pipeline (database engine & done index) is set up by the first task, not at import
+pipe = None
 
-# quick line counting
-with open(file, encoding='utf-8') as f:
-    line_count = len(list(csv.reader(f)))
-split = math.ceil(line_count/4)
-print(f"Task size: {line_count}\nSplit: 4x {split}")
 
-# save as iterable chunks
-chunks = pd.read_csv(file, encoding='utf-8', chunksize=split)
+def pipeline():
+    """Returns the worker's Pipeline, initiating it on first use."""
+    global pipe
+    if pipe is None:
+        pipe = Pipeline()
+    return pipe
 
-# iterate chunks out to memory
-chunk1 = next(chunks)
-chunk2 = next(chunks)
-chunk3 = next(chunks)
-chunk4 = next(chunks)
+
+def route(url):
+    """Returns queue for a site using a stable hash of its host (worker1 to workerN)."""
+    host = HostScheduler.host(url)
+    return f"worker{zlib.crc32(host.encode('utf-8')) % SHARDS + 1}"
 
 
 # debug function
@@ -55,51 +66,65 @@ def debug(index):
     print(index)
 
 
-# main functions (cannot pass df directly into args since not JSON encodable)
+# main function (row is a JSON encodable dict with 'id', 'name' & 'url' keys)
 @app.task
-def scrape1(index):
-    row = chunk1.loc[index]
-    pipe.etl(
-        row['url'], 
+def scrape(row):
+    pipeline().etl(
+        row['url'],
         id=int(row['id']),
         name=row['name']
         )
 
-@app.task
-def scrape2(index):
-    row = chunk2.loc[index]
-    pipe.etl(
-        row['url'], 
-        id=int(row['id']),
-        name=row['name']
-        )
 
-@app.task
-def scrape3(index):
-    row = chunk3.loc[index]
-    pipe.etl(
-        row['url'], 
-        id=int(row['id']),
-        name=row['name']
-        )
+def crawl(row):
+    """Runs etl for one row of a batch, printing rather than raising exceptions so the rest of the batch carries on.
+    Returns True if site was scraped successfully."""
+    try:
+        scrape(row)
+        return True
+    except Exception as e:
+        print(f"Exception encountered for {row['url']}: {e.args}")
+        return False
+
 
+# batch function (rows is a list of row dicts, all routed to the same queue)
 @app.task
-def scrape4(index):
-    row = chunk4.loc[index]
-    pipe.etl(
-        row['url'], 
-        id=int(row['id']),
-        name=row['name']
-        )
+def scrape_batch(rows):
+    # worker runs in Eventlet pool, so green threads crawl the batch's sites concurrently
+    import eventlet
+    pool = eventlet.GreenPool(len(rows))
+    completed = sum(pool.imap(crawl, rows))
+    # failures no longer show up as failed tasks in flower, so report them in the task result
+    # (early stopping totals are for the worker process so far)
+    result = {'completed': completed, 'failed': len(rows) - completed}
+    if Neo.STOP is not None:
+        result['stopping'] = Neo.STOP.stats()
+    return result
 
 
 # output function
-def run():
-    for index in chunk1.index:
-        scrape1.apply_async(args=[index], queue='worker1')
-    for index in chunk2.index:
-        scrape2.apply_async(args=[index], queue='worker2')
-    for index in chunk3.index:
-        scrape3.apply_async(args=[index], queue='worker3')
-    for index in chunk4.index:
-        scrape4.apply_async(args=[index], queue='worker4')
\ No newline at end of file
+def run(batch=BATCH):
+    # pandas is only needed to enqueue, so workers never import it
+    import pandas as pd
+    counts = [0] * SHARDS
+    batches = {}
+    messages = 0
+    # reuse one broker connection for every message
+    with app.producer_or_acquire() as producer:
+        for chunk in pd.read_csv(file, encoding='utf-8', chunksize=10000):
+            # rows without urls have nothing to scrape
+            for row in chunk.dropna(subset=['url']).itertuples(index=False):
+                queue = route(row.url)
+                counts[int(queue[6:]) - 1] += 1
+                rows = batches.setdefault(queue, [])
+                rows.append({'id': int(row.id), 'name': str(row.name), 'url': row.url})
+                if len(rows) >= batch:
+                    scrape_batch.apply_async(args=[rows], queue=queue, producer=producer)
+                    messages += 1
+                    batches[queue] = []
+        # send whatever is left of each queue's batch
+        for queue, rows in batches.items():
+            if rows:
+                scrape_batch.apply_async(args=[rows], queue=queue, producer=producer)
+                messages += 1
+    print(f"Task size: {sum(counts)} in {messages} messages\nSplit: {counts}")
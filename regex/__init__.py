@@ -5,6 +5,34 @@ on the spreadsheet & identify null values later.
 """
 
 import re
+from concurrent.futures import ProcessPoolExecutor
+from regex.engine import Matcher
+
+
+# remember to account for '£x coff' i.e. coffee
+DISCOUNTS = r"£\d{1,3}[^£C]{0,5}off|\d{1,2}[^%]{0,5}%[^%]{0,5}off|\d{1,2}[^%]{0,5}%[^%]{0,5}discount"
+# aim is to also return context 20 characters before and after mention
+# prevent parsing words with 'free' (e.g. freedom)
+FREEBIES = r".{0,19}\Wfree\W.{0,19}"
+# use 'subscri' since it's a root that can cover 'subscription' and 'subscribe'
+SUBSCRIPTIONS = r".{0,20}giftcard.{0,20}|.{0,20}gift card.{0,20}|.{0,20}voucher.{0,20}|.{0,20}subscri.{0,20}|.{0,20}membership.{0,20}"
+
+# compiled once at import rather than on every call
+_discounts = re.compile(DISCOUNTS, re.I)
+_freebies = re.compile(FREEBIES, re.I)
+_subscriptions = re.compile(SUBSCRIPTIONS, re.I)
+# every match contains one of these literals, at most 20 characters after the match starts
+ANCHORS = ['£', '%', 'free', 'giftcard', 'gift card', 'voucher', 'subscri', 'membership']
+# single-pass scanner used by Trinity, only tries matches around anchors
+_trinity = Matcher({'disc': DISCOUNTS, 'free': FREEBIES, 'subs': SUBSCRIPTIONS}, anchors=ANCHORS, reach=20)
+
+
+def _found(result):
+    """Returns set of matches, else empty string."""
+    if result:
+        return set(result)
+    else:
+        return ''
 
 
 def find_discounts(text):
@@ -17,14 +45,7 @@ def find_discounts(text):
         Matching set of string sequences if discount found, else empty string.
     """
 
-    # remember to account for '£x coff' i.e. coffee
-    pattern = r"£\d{1,3}[^£C]{0,5}off|\d{1,2}[^%]{0,5}%[^%]{0,5}off|\d{1,2}[^%]{0,5}%[^%]{0,5}discount"
-    result = re.findall(pattern, text, re.I)
-
-    if result:
-        return set(result)
-    else:
-        return ''
+    return _found(_discounts.findall(text))
 
 
 def find_freebies(text):
@@ -38,10 +59,11 @@ def find_freebies(text):
         Matching set of string sequences if discount found, else empty string.
     """
 
-    # aim is to also return context 20 characters before and after mention
-    # prevent parsing words with 'free' (e.g. freedom)
-    pattern = r".{0,19}\Wfree\W.{0,19}"
-    result = re.findall(pattern, text, re.I)
+    return _filter_freebies(_freebies.findall(text))
+
+
+def _filter_freebies(result):
+    """Removes freebie matches that are more likely gluten free, free range or vouchers/subs."""
 
     if result:
         # create new set of items to be removed (can't remove iteratively since index positions change)
@@ -76,14 +98,7 @@ def find_subscriptions(text):
         Matching set of string sequences if discount found, else empty string.
     """
 
-    # use 'subscri' since it's a root that can cover 'subscription' and 'subscribe'
-    pattern = r".{0,20}giftcard.{0,20}|.{0,20}gift card.{0,20}|.{0,20}voucher.{0,20}|.{0,20}subscri.{0,20}|.{0,20}membership.{0,20}"
-    result = re.findall(pattern, text, re.I)
-
-    if result:
-        return set(result)
-    else:
-        return ''
+    return _found(_subscriptions.findall(text))
 
 
 class Trinity:
@@ -94,6 +109,8 @@ class Trinity:
         trin = Trinity(text)
         discounts = trin.disc
         score = trin.score()
+        # batch of texts across all cores
+        results = Trinity.score_many(texts)
     
     Args:
         text (str): Input text to be processed.
@@ -105,12 +122,16 @@ class Trinity:
     
     Methods:
         score: Calculates compatibility score.
+        scored: Returns score & matches for a text (classmethod).
+        score_many: Scores a batch of texts across a process pool (classmethod).
     """
 
     def __init__(self, text):
-        self.disc = find_discounts(text)
-        self.free = find_freebies(text)
-        self.subs = find_subscriptions(text)
+        # scan text once & hand matches to each detector (same sets as calling find_* separately)
+        hits = _trinity.scan(text)
+        self.disc = _found(hits['disc'])
+        self.free = _filter_freebies(hits['free'])
+        self.subs = _found(hits['subs'])
 
     def score(self):
         """Returns compatibility score for CRM product.
@@ -124,4 +145,31 @@ class Trinity:
         • no longer logging score, just using weighted sum to rank later
         """
 
-        return 10 * len(self.disc) + 2 * len(self.free) + len(self.subs)
\ No newline at end of file
+        return 10 * len(self.disc) + 2 * len(self.free) + len(self.subs)
+
+    @classmethod
+    def scored(cls, text):
+        """Returns (score, disc, free, subs) tuple for text. Picklable so it can run in worker processes."""
+
+        trin = cls(text)
+        return trin.score(), trin.disc, trin.free, trin.subs
+
+    @classmethod
+    def score_many(cls, texts, pool=None, processes=None, chunksize=16):
+        """Scores a batch of texts across a process pool, keeping input order.
+        Pass an existing pool when scoring a stream of batches to avoid restarting processes.
+
+        Args:
+            texts (iterable): Texts to be processed.
+            pool (:obj: concurrent.futures.Executor, optional): Pool to use. Default is None (new process pool).
+            processes (int, optional): Number of processes for a new pool. Default is None (all cores).
+            chunksize (int, optional): Texts sent to a process at a time. Default is 16.
+
+        Returns:
+            list: List of (score, disc, free, subs) tuples.
+        """
+
+        if pool is not None:
+            return list(pool.map(cls.scored, texts, chunksize=chunksize))
+        with ProcessPoolExecutor(processes) as pool:
+            return list(pool.map(cls.scored, texts, chunksize=chunksize))
@@ -1,9 +1,49 @@
 """Dynamic constructs for customizing regex functions. Remember to unit test any new regex sequence!
 
 Will have to define new score calculator (can inherit from Trinity)
+
+Patterns are compiled once (New & Registry at construction, find_custom on first use) rather than on
+every call. Custom patterns can be given anchors: literals of which every match contains one (see
+regex.engine). Anchored patterns are compiled into one Matcher that only tries matches near anchors,
+and a Registry merges the anchored patterns of all its detectors into one such scan, so a Trinity
+subclass with many custom detectors still scans each page once. Without anchors a combined scan
+defeats re's literal search and is slower than separate scans, so those patterns are scanned one by
+one (identical patterns shared by several detectors are scanned once).
 """
 
 import re
+from functools import lru_cache
+from regex.engine import Matcher
+
+
+@lru_cache(maxsize=256)
+def _compile(pattern):
+    """Returns compiled case-insensitive pattern, compiling each pattern string once."""
+    return re.compile(pattern, re.I)
+
+
+def _filtered(result, logic, verdicts=None):
+    """Returns set of unique matches that pass logic (each checked once), else empty string.
+
+    Args:
+        result (iterable): Matches.
+        logic (func): Filter returning True for matches to keep, or None to keep all.
+        verdicts (dict, optional): Cache of match -> logic verdict shared across a batch of texts. Default is None.
+    """
+
+    result = set(result)
+    if result and logic is not None:
+        if verdicts is None:
+            verdicts = {}
+        for e in result:
+            if e not in verdicts:
+                verdicts[e] = bool(logic(e))
+        # keep those that pass inspection
+        result = {e for e in result if verdicts[e]}
+    if result:
+        return result
+    else:
+        return ''
 
 
 def find_custom(pattern, text):
@@ -16,7 +56,7 @@ def find_custom(pattern, text):
     Returns:
         Matching set of string sequences if discount found, else empty string.      
     """
-    result = re.findall(pattern, text, re.I)
+    result = _compile(pattern).findall(text)
 
     if result:
         return set(result)
@@ -39,22 +79,42 @@ class New:
         # we don't have to assign pattern again for parsing new text (unlike quicker find_custom method)
         text2 = "Regex is easy!"
         result2 = find_new.match(text2)
+        # batch of texts (logic runs once per unique match across the batch)
+        results = find_new.match_many([text1, text2])
+        # every match contains 'regex' within 10 characters of its start, so only scan near it
+        find_fast = New(patterns, logic=foo, anchors=['regex'], reach=10)
 
     Args:
         pattern (str): Regex pattern to match
         logic (func, optional): Function to filter regex match that returns a boolean value. Default is None.
+        anchors (seq, optional): Literals of which every match contains at least one. Default is None.
+        reach (int, optional): Max chars between a match's start and its anchor. Default is 20.
 
     Attributes:
         patterns (seq): Regex patterns to match in list/set form
         logic (func): Function to filter regex match that returns a boolean value.
+        anchors (list): Literals of which every match contains at least one (empty if unknown).
+        reach (int): Max chars between a match's start and its anchor.
+        compiled (list): Compiled patterns.
 
     Methods:
         match: Matches input string to patterns.
+        match_many: Matches a batch of strings.
+        hits: Returns matches of each pattern.
+        resolve: Turns matches of each pattern into match's result.
     """
 
-    def __init__(self, patterns, logic=None):
-        self.patterns = patterns
+    def __init__(self, patterns, logic=None, anchors=None, reach=20):
+        self.patterns = list(patterns)
         self.logic = logic
+        self.anchors = list(anchors or [])
+        self.reach = reach
+        # compiled once here rather than by re.findall on every call
+        self.compiled = [_compile(pattern) for pattern in self.patterns]
+        if self.anchors and self.patterns:
+            self.__matcher = Matcher(dict(enumerate(self.patterns)), anchors=self.anchors, reach=reach)
+        else:
+            self.__matcher = None
     
     def match(self, text):
         """Same construct as find_freebies but dynamic
@@ -66,27 +126,144 @@ class New:
             Matching set of string sequences if discount found, else None.
         """
 
-        result = []
-        for pattern in self.patterns:
-            result += re.findall(pattern, text, re.I)
-        result = set(result)
-        if result:
-            if self.logic is None:
-                return result
-            else:
-                filter = set()
-                for e in result:
-                    # if passes inspection
-                    if self.logic(e):
-                        continue
-                    # else add to filter
-                    else:
-                        filter.add(e)
-                # remove those that didn't pass logic using set difference
-                result.difference_update(filter)
-                if len(result) > 0:
-                    return result
+        return self.resolve(self.hits(text))
+
+    def match_many(self, texts):
+        """Matches each text in a batch, checking logic once per unique match across the batch.
+
+        Args:
+            texts (iterable): Input texts to be parsed.
+
+        Returns:
+            list: Result of match for each text.
+        """
+
+        verdicts = {}
+        return [self.resolve(self.hits(text), verdicts) for text in texts]
+
+    def hits(self, text):
+        """Returns list of re.findall-style matches of each pattern in text."""
+
+        if self.__matcher is not None:
+            return list(self.__matcher.scan(text).values())
+        return [pattern.findall(text) for pattern in self.compiled]
+
+    def resolve(self, hits, verdicts=None):
+        """Returns set of matches that pass logic, else empty string.
+
+        Args:
+            hits (iterable): List of matches of each pattern.
+            verdicts (dict, optional): Cache of logic verdicts shared across a batch. Default is None.
+        """
+
+        return _filtered((e for found in hits for e in found), self.logic, verdicts)
+
+
+class Registry:
+    """Set of named custom detectors, compiled once & matched together.
+    Anchored patterns of all detectors share one scan of the text.
+
+    Use:
+        detectors = Registry()
+        detectors.register('cashback', [r".{0,20}cashback.{0,20}"], anchors=['cashback'])
+        detectors.register('trial', [r".{0,20}free trial.{0,20}"], logic=foo, anchors=['free trial'])
+        found = detectors.scan(text)
+        cashback = found['cashback']
+        batch = detectors.match_many(texts)
+
+    Args:
+        None.
+
+    Attributes:
+        detectors (dict): Detector name -> New instance.
+
+    Methods:
+        register: Adds a detector.
+        scan: Matches all detectors over a text.
+        match_many: Scans a batch of texts.
+    """
+
+    def __init__(self):
+        self.detectors = {}
+        # combined scans, rebuilt on first scan after a register
+        self.__built = False
+        self.__matcher = None
+        self.__plain = {}
+
+    def __len__(self):
+        return len(self.detectors)
+
+    def register(self, name, patterns, logic=None, anchors=None, reach=20):
+        """Adds (or replaces) a detector.
+
+        Args:
+            name (str): Detector name, used as key of scan results.
+            patterns (seq): Regex patterns to match.
+            logic (func, optional): Function to filter regex match that returns a boolean value. Default is None.
+            anchors (seq, optional): Literals of which every match contains at least one. Default is None.
+            reach (int, optional): Max chars between a match's start and its anchor. Default is 20.
+
+        Returns:
+            :obj: New: Detector, which can also match on its own.
+        """
+
+        self.detectors[name] = New(patterns, logic, anchors, reach)
+        self.__built = False
+        return self.detectors[name]
+
+    def __build(self):
+        """Merges anchored patterns into one Matcher & groups the rest by pattern."""
+
+        anchored = {}
+        anchors = set()
+        reach = 0
+        self.__plain = {}
+        for name, detector in self.detectors.items():
+            for i, pattern in enumerate(detector.compiled):
+                if detector.anchors:
+                    # one entry per (detector, pattern) keeps re.findall semantics for every pattern,
+                    # and every pattern is still tried near its own anchors
+                    anchored[(name, i)] = pattern.pattern
+                    anchors.update(detector.anchors)
+                    reach = max(reach, detector.reach)
                 else:
-                    return ''
-        else:
-            return ''
\ No newline at end of file
+                    self.__plain.setdefault(pattern, []).append(name)
+        self.__matcher = Matcher(anchored, anchors=anchors, reach=reach) if anchored else None
+        self.__built = True
+
+    def scan(self, text, verdicts=None):
+        """Matches every detector over text (anchored patterns in one pass).
+
+        Args:
+            text (str): Input text to be parsed.
+            verdicts (dict, optional): Detector name -> cache of logic verdicts shared across a batch. Default is None.
+
+        Returns:
+            dict: Detector name -> result of the detector's match.
+        """
+
+        if not self.__built:
+            self.__build()
+        hits = {name: [] for name in self.detectors}
+        if self.__matcher is not None:
+            for (name, _), found in self.__matcher.scan(text).items():
+                hits[name].append(found)
+        for pattern, names in self.__plain.items():
+            found = pattern.findall(text)
+            for name in names:
+                hits[name].append(found)
+        return {name: detector.resolve(hits[name], None if verdicts is None else verdicts.setdefault(name, {}))
+            for name, detector in self.detectors.items()}
+
+    def match_many(self, texts):
+        """Scans each text in a batch, checking each detector's logic once per unique match across the batch.
+
+        Args:
+            texts (iterable): Input texts to be parsed.
+
+        Returns:
+            list: Result of scan for each text.
+        """
+
+        verdicts = {}
+        return [self.scan(text, verdicts) for text in texts]
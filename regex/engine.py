@@ -0,0 +1,139 @@
+"""Single-pass matching engine for running several regex detectors over the same text.
+
+Calling re.findall once per detector scans the whole text once per detector. Matcher instead
+compiles all detector patterns into one alternation of lookaheads, so the text is scanned once
+and only positions where some detector matches are handed back to Python. Each detector then keeps
+re.findall's leftmost, non-overlapping semantics, so results are identical to separate findall calls.
+
+Leading wildcards such as .{0,20} still make the regex engine try a match at every offset. When every
+match must contain one of a few literal anchors (e.g. 'free' or '%'), Matcher can instead find anchor
+positions in one linear pass and only try matches within `reach` characters before each anchor.
+Text without any anchors skips regex matching entirely.
+
+Patterns must not be able to match an empty string (none of Trinity's can). Patterns whose groups
+can't be renumbered inside the combined regex (backreferences, named groups, global inline flags
+like (?i)) are tried on their own at the same offsets instead.
+"""
+
+import re
+
+
+class Matcher:
+    """Precompiled multi-pattern scanner returning re.findall-equivalent matches per detector.
+
+    Use:
+        matcher = Matcher({'disc': r"\\d{1,2}%off", 'free': r".{0,19}\\Wfree\\W.{0,19}"}, anchors=['%', 'free'], reach=20)
+        hits = matcher.scan(text)
+        discounts = hits['disc']
+
+    Args:
+        patterns (dict): Detector name -> regex pattern string.
+        flags (int, optional): Regex flags for all patterns. Default is re.I.
+        anchors (seq, optional): Literals of which every match contains at least one. Default is None (scan every offset).
+        reach (int, optional): Max chars between a match's start and its anchor. Default is 0.
+
+    Attributes:
+        names (list): Detector names in order of priority in the combined scan.
+        compiled (list): Compiled pattern of each detector.
+        reach (int): Max chars between a match's start and its anchor.
+
+    Methods:
+        joinable: Returns True if a pattern can go in the combined scan (staticmethod).
+        scan: Returns each detector's matches in text.
+    """
+
+    # backreferences (\1, (?P=name), (?(1)...)) & global inline flags break once wrapped in the combined regex
+    UNJOINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)")
+
+    def __init__(self, patterns, flags=re.I, anchors=None, reach=0):
+        self.names = list(patterns)
+        self.reach = reach
+        self.compiled = [re.compile(pattern, flags) for pattern in patterns.values()]
+        self.__joined = [i for i, compiled in enumerate(self.compiled) if Matcher.joinable(compiled)]
+        self.__alone = [i for i, compiled in enumerate(self.compiled) if not Matcher.joinable(compiled)]
+        # named group in a lookahead per detector, so match.lastgroup tells which detector matched first
+        # and the group holds its match without consuming text needed by the other detectors
+        if self.__joined:
+            self.__combined = re.compile('|'.join(f"(?=(?P<_{i}>{self.compiled[i].pattern}))" for i in self.__joined), flags)
+        else:
+            self.__combined = None
+        if anchors:
+            # literal alternation is scanned by re in one pass using a first-character set,
+            # the lookahead reports overlapping anchors too
+            self.__anchors = re.compile('(?=' + '|'.join(re.escape(a) for a in sorted(anchors, key=len, reverse=True)) + ')', flags)
+        else:
+            self.__anchors = None
+
+    @staticmethod
+    def joinable(compiled):
+        """Returns True if a compiled pattern keeps its meaning inside the combined regex
+        (named groups could clash between patterns, so they count as unjoinable too)."""
+        return not compiled.groupindex and not Matcher.UNJOINABLE.search(compiled.pattern)
+
+    @staticmethod
+    def value(hit):
+        """Returns what re.findall would have returned for a match object."""
+        groups = hit.re.groups
+        if groups == 0:
+            return hit.group(0)
+        elif groups == 1:
+            return hit.group(1) or ''
+        else:
+            return hit.groups(default='')
+
+    def scan(self, text):
+        """Scans text once for all detectors.
+
+        Args:
+            text (str): Text to be parsed.
+
+        Returns:
+            dict: Detector name -> list of matches, as re.findall would return them.
+        """
+
+        found = [[] for _ in self.names]
+        # each detector resumes after the end of its own last match, as in re.findall
+        resume = [0] * len(self.names)
+        if self.__anchors is None:
+            if self.__combined is not None:
+                for m in self.__combined.finditer(text):
+                    self.__route(text, m, found, resume)
+            for k in self.__alone:
+                found[k] = self.compiled[k].findall(text)
+        else:
+            start = 0
+            for anchor in self.__anchors.finditer(text):
+                end = anchor.start() + 1
+                # only offsets within reach of an anchor can start a match
+                for i in range(max(start, end - 1 - self.reach), end):
+                    if self.__combined is not None:
+                        m = self.__combined.match(text, i)
+                        if m:
+                            self.__route(text, m, found, resume)
+                    for k in self.__alone:
+                        if i >= resume[k]:
+                            self.__try(text, i, k, found, resume)
+                start = end
+        return dict(zip(self.names, found))
+
+    def __route(self, text, m, found, resume):
+        """Hands a combined match at some position to every detector that matches there."""
+
+        i = m.start()
+        first = int(m.lastgroup[1:])
+        if i >= resume[first] and self.compiled[first].groups == 0:
+            found[first].append(m.group(m.lastgroup))
+            resume[first] = m.end(m.lastgroup)
+        # detectors before the one that matched cannot match at this position
+        for k in self.__joined:
+            if k < first or i < resume[k]:
+                continue
+            self.__try(text, i, k, found, resume)
+
+    def __try(self, text, i, k, found, resume):
+        """Matches detector k at position i, recording any match."""
+
+        hit = self.compiled[k].match(text, i)
+        if hit:
+            found[k].append(self.value(hit))
+            resume[k] = hit.end()
@@ -0,0 +1,55 @@
+import pytest
+import re
+from regex.custom import *
+from regex_tests.test_trinity import CASES
+
+PATTERNS = [r".{0,10}\Wfree\W.{0,10}", r"(\d{1,2})%", r"gift (card|voucher)", r"subscri(be|ption)s?"]
+# every match of PATTERNS contains one of these within 11 characters of its start
+ANCHORS = ['free', '%', 'gift', 'subscri']
+
+def logic(e):
+    return 'gluten' not in str(e).lower()
+
+def findall(patterns, text):
+    # what New.match did before patterns were compiled into one scan
+    result = set()
+    for pattern in patterns:
+        result.update(re.findall(pattern, text, re.I))
+    return set(e for e in result if logic(e)) or ''
+
+class Tests:
+    def test_new_matches_findall(self):
+        for find_new in (New(PATTERNS, logic=logic), New(PATTERNS, logic=logic, anchors=ANCHORS, reach=11)):
+            for text in CASES:
+                assert find_new.match(text) == findall(PATTERNS, text)
+            assert find_new.match_many(CASES) == [findall(PATTERNS, text) for text in CASES]
+
+    def test_find_custom(self):
+        assert find_custom(r"\d{1,2}% cashback", 'get 5% CASHBACK now') == {'5% CASHBACK'}
+        assert find_custom(r"cashback", 'nothing here') == ''
+
+    def test_registry(self):
+        detectors = Registry()
+        detectors.register('free', PATTERNS[:1], logic=logic, anchors=['free'], reach=11)
+        detectors.register('other', PATTERNS[1:])
+        detectors.register('gift', PATTERNS[2:3], anchors=['gift'])
+        detectors.register('none', [])
+        for text, found in zip(CASES, detectors.match_many(CASES)):
+            assert found == detectors.scan(text)
+            assert found['free'] == findall(PATTERNS[:1], text)
+            assert found['other'] == (set(e for p in PATTERNS[1:] for e in re.findall(p, text, re.I)) or '')
+            assert found['gift'] == (set(re.findall(PATTERNS[2], text, re.I)) or '')
+            assert found['none'] == ''
+
+    def test_patterns_kept_out_of_combined_scan(self):
+        # backreferences, named groups & global inline flags can't be renumbered inside one regex
+        patterns = [r"(a)(b)-\2", r"(\w+) \1", r"(?i)FREE trial", r"(?P<pct>\d+)% off", r"gift (card)"]
+        text = 'ab-b then hey hey, a Free Trial, 20% off & a gift card'
+        expected = set(e for p in patterns for e in re.findall(p, text, re.I))
+        assert New(patterns).match(text) == expected
+        assert New(patterns, anchors=['-', ' ', 'free', '%', 'gift'], reach=10).match(text) == expected
+        assert New([r"(a)(b)-\2"], anchors=['ab']).match('ab-b') == {('a', 'b')}
+        detectors = Registry()
+        detectors.register('back', patterns[:2], anchors=['-', ' '], reach=10)
+        detectors.register('rest', patterns[2:], anchors=['free', '%', 'gift'], reach=10)
+        assert detectors.scan(text) == {'back': {('a', 'b'), 'hey'}, 'rest': {'Free Trial', '20', 'card'}}
@@ -0,0 +1,47 @@
+import pytest
+from regex import *
+import pandas as pd
+
+# strings from the find_* tests, plus overlaps between detectors
+CASES = [
+    'sdsdvsvsd',
+    '15% off, 15% off',
+    '£10 â\x80\x93 off selected items',
+    '10 â\x80\x93 % â\x80\x93 off  selected items',
+    '£3 coffee',
+    '20%off 50 % discount',
+    'product free for first month for non-members, and free for two months for subscribers',
+    'gluten free bread ................. free range egg.......... gluten free range bread',
+    'this product is a â\x80\x93 gift card ',
+    'product free for first month for voucher holders, and free for two months for subscribers',
+    'free gift card voucher with 10% off membership, free free free £5 off subscription',
+    ' FREE!\nSUBSCRIBE!\n25% Off',
+]
+
+class Tests:
+    def test_matches_find_functions(self):
+        # Trinity scans text once & must return exactly what the separate find_* functions return
+        df = pd.read_csv('sites_data/initial.csv', index_col='id')
+        for text in CASES + list(df['content']):
+            trin = Trinity(text)
+            assert trin.disc == find_discounts(text)
+            assert trin.free == find_freebies(text)
+            assert trin.subs == find_subscriptions(text)
+
+    def test_score(self):
+        trin = Trinity('20%off 50 % discount, free delivery for members')
+        assert trin.score() == 10 * 2 + 2 * 1
+
+    def test_anchor_prefilter(self):
+        # scanning only around anchors must give the same matches as trying every offset
+        full = Matcher({'disc': DISCOUNTS, 'free': FREEBIES, 'subs': SUBSCRIPTIONS})
+        anchored = Matcher({'disc': DISCOUNTS, 'free': FREEBIES, 'subs': SUBSCRIPTIONS}, anchors=ANCHORS, reach=20)
+        df = pd.read_csv('sites_data/initial.csv', index_col='id')
+        for text in CASES + list(df['content']):
+            assert anchored.scan(text) == full.scan(text)
+        # no anchors means no matches
+        assert anchored.scan('nothing to see here') == {'disc': [], 'free': [], 'subs': []}
+
+    def test_score_many(self):
+        # batch scoring across processes keeps input order & matches single scoring
+        assert Trinity.score_many(CASES, processes=2) == [Trinity.scored(text) for text in CASES]
@@ -0,0 +1,61 @@
+"""Re-scores a stored page corpus (csv with a content column, like sites_data/initial.csv) with Trinity.
+
+The corpus is streamed in chunks and each chunk is scored across a process pool, with scores and
+matches appended to the output file as each chunk finishes, so memory stays flat for large crawls.
+
+Run using:
+$ python rescore.py sites_data/initial.csv sites_data/rescored.csv
+
+Options:
+    --column      column holding page text (default: content)
+    --chunksize   rows read & written at a time (default: 1000)
+    --processes   worker processes (default: all cores)
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from regex import Trinity
+
+
+def rescore(source, target, column='content', chunksize=1000, processes=None):
+    """Scores source csv chunk by chunk and writes results to target csv.
+
+    Args:
+        source (str): Path of corpus csv.
+        target (str): Path of output csv.
+        column (str, optional): Column holding page text. Default is 'content'.
+        chunksize (int, optional): Rows read & written at a time. Default is 1000.
+        processes (int, optional): Worker processes. Default is None (all cores).
+
+    Returns:
+        int: Number of rows scored.
+    """
+
+    rows = 0
+    with ProcessPoolExecutor(processes) as pool, open(target, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, chunk in enumerate(pd.read_csv(source, encoding='utf-8', chunksize=chunksize)):
+            results = Trinity.score_many(chunk[column].fillna('').astype(str), pool=pool)
+            chunk['score'] = [r[0] for r in results]
+            chunk['discounts'] = [r[1] for r in results]
+            chunk['freebies'] = [r[2] for r in results]
+            chunk['subscriptions'] = [r[3] for r in results]
+            # drop contents column to replicate real csv file
+            chunk.drop(column, axis=1).to_csv(f, header=(i == 0), index=False)
+            rows += len(chunk)
+            print(f"Scored: {rows}")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-score a stored page corpus with Trinity.')
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--column', default='content')
+    parser.add_argument('--chunksize', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    rows = rescore(args.source, args.target, args.column, args.chunksize, args.processes)
+    print(f"Rescored {rows} rows in {time.perf_counter() - start:.1f} secs")
@@ -1,12 +1,31 @@
 """This file contains the scraper module Neo adapted from QuickScrape in data_generator.py."""
 
-import requests
-from bs4 import BeautifulSoup
-import time
 from regex import Trinity
-from sqlalchemy import create_engine, Column, String, Integer, MetaData, Table, insert, exc
+from scraper.politeness import HostScheduler
+from scraper.session import SessionPool
+from scraper.frontier import Frontier
+from scraper.extract import extract
+from scraper.fingerprint import BlockFilter
+from scraper.urls import canonicalize
+from scraper.links import LinkSelector
+from scraper.stopping import StopPolicy
+from scraper.bitmap import Bitmap
+from scraper.checkpoint import Checkpoints
+from scraper.cache import PageCache
+from scraper.metrics import Metrics
+from sqlalchemy import create_engine, event, Column, String, Integer, MetaData, Table, Index, insert, exc
+from sqlalchemy.dialects import sqlite, postgresql
 from decouple import config
-import pandas as pd
+import atexit
+import gzip
+import os
+import time
+
+
+class RetryLater(Exception):
+    """Raised by fetch when a page can't be had right now (429 backoff, or not cached when replaying).
+    On a homepage it fails the site, so the site isn't marked done and is crawled again next run."""
+
 
 class Neo:
     """Scraper that goes 2 links deep into a given site and applies the Trinity parser
@@ -24,19 +43,62 @@ class Neo:
     Attributes:
         href1 (str): Initial (1st) link.
         results (dict): Dictionary of results for each page, able to be turned into DataFrame.
+        frontier (:obj: Frontier): Links still to visit, visited set & page budget.
+        blocks (:obj: BlockFilter): Text blocks already seen on the site.
+        yields (:obj: SiteYield): Yield of the site's pages so far, checked against STOP (None if STOP is None).
+        checkpoint (callable): Called with the scraper after each finished batch of pages (e.g. to save state). Default is None.
 
     Methods:
         find_hrefs: Finds all links in a given page.
+        resolve: Turns internal links into canonical full links.
+        digest: Scores page HTML and append to results.
+        accepts: Checks whether content type may hold HTML.
+        fetch: Downloads page HTML (or reads it from CACHE).
+        decode: Returns HTML of a cached page.
+        text: Decodes a page body.
         parse: Parses page and append to results.
+        follow: Parses secondary page, printing any exception.
         execute: Execute scraper instance.
+        exhausted: Checks whether the site has stopped yielding.
+        save: Calls checkpoint.
+        state: Returns JSON encodable crawl state.
+        restore: Carries on from a saved crawl state.
     """
 
-    # cooldown between pages in secs
+    # cooldown between requests to the same host in secs
     COOLDOWN = 5
-    # limit for number of pages
+    # limit for number of pages after homepage
     PAGE_LIMIT = 15
+    # number of link levels to visit (homepage is level 0)
+    DEPTH = 2
+    # max pages of the same site fetched at once
+    PARALLEL = 4
     # rest time in seconds after 429 response
     NO_SPAM = 90
+    # request timeout in secs
+    TIMEOUT = 5
+    # max bytes read of a page (truncated pages are still parsed)
+    MAX_BYTES = 1024 * 1024
+    # bytes read from the socket at a time
+    CHUNK = 64 * 1024
+    # content types worth downloading
+    CONTENT_TYPES = ('text/html', 'application/xhtml')
+    # per-host cooldowns shared by all scrapers in the worker process (reads COOLDOWN & PARALLEL on every booking)
+    SCHEDULER = HostScheduler(lambda: Neo.COOLDOWN, lanes=lambda: Neo.PARALLEL)
+    # keep-alive sessions shared by all scrapers in the worker process
+    # (SESSIONS in .env should be at least the worker's concurrency, e.g. -c 12000, or sessions are evicted between pages)
+    SESSIONS = SessionPool(size=config('SESSIONS', default=20000, cast=int))
+    # on-disk page cache shared by all scrapers in the worker process (set up by Pipeline if CACHE_DIR is in .env)
+    CACHE = None
+    # score text blocks repeated across a site's pages (header, nav, banners) only on the first page they're found
+    SKIP_SEEN = True
+    # which links to follow & which first (e.g. LinkSelector(priority={'menu': 5}) to crawl menus first)
+    LINKS = LinkSelector()
+    # ends a site's crawl once pages stop yielding, totals in STOP.stats() (off by default: on the site farm
+    # StopPolicy(zeros=5, stale=8) missed about half the score, so check thresholds against neo_bench first)
+    STOP = None
+    # per-phase latency histograms of the worker process (exported to METRICS_FILE by Pipeline if set in .env)
+    METRICS = Metrics()
 
     # initialize scraper with href1 (initial (1st) link)
     def __init__(self, href1):
@@ -47,13 +109,19 @@ class Neo:
         'freebies': [], 
         'subscriptions': []
         }
+        self.frontier = Frontier(Neo.DEPTH, Neo.PAGE_LIMIT + 1, rank=Neo.LINKS.priority)
+        self.blocks = BlockFilter()
+        self.yields = Neo.STOP.track() if Neo.STOP is not None else None
+        self.checkpoint = None
     
-    def find_hrefs(self, soup, filter=True):
-        """Finds all the links in a site page and returns as a set.
+    def find_hrefs(self, links, filter=True):
+        """Finds all the relevant links in a site page and returns as a set.
         Update: filter links at find_href rather than parse.
+        Update: takes hrefs from scraper.extract rather than soup.
+        Update: irrelevant pages are filtered by LINKS' compiled rules (frontier ranks what's left by LINKS' priority).
         
         Args:
-            soup (str): Site HTML.
+            links (iterable): hrefs of all anchor tags in page.
             filter (bool, optional): Whether to apply filter to hrefs found. Default is True.
         
         Returns:
@@ -62,23 +130,165 @@ class Neo:
 
         if filter:
             hrefs = set()
-            for tag in soup.find_all('a', href=True):
-                href = tag.get('href')
+            for href in links:
                 if len(href) > 2:
                     # prevent going onto other sites & saving internal id links
                     if (self.href1 not in href and href[0] != '/') or href[0] == '#':
                         continue
                     # filter out irrelevant pages (to increase regex accuracy)
-                    elif 'terms' in href or 'conditions' in href or 'download' in href or 'policy' in href or 'map' in href or 'login' in href or 'privacy' in href:
+                    elif not Neo.LINKS.allows(href):
                         continue
                     else:
                         hrefs.add(href)
                 else:
                     continue
         else:
-            hrefs = set(tag.get('href') for tag in soup.find_all('a', href=True))
+            hrefs = set(links)
         return hrefs
 
+    def resolve(self, href):
+        """Turns internal links into canonical full links relative to href1 (see scraper.urls).
+
+        Args:
+            href (str): Link found in page.
+
+        Returns:
+            str: Full link to visit.
+        """
+
+        return canonicalize(href, self.href1)
+
+    def digest(self, href, html):
+        """Applies Trinity to page HTML and appends findings to results attribute.
+        Shared by blocking and asyncio scrapers so scoring stays identical.
+        Text blocks already seen on the site's earlier pages are not scored again (see SKIP_SEEN),
+        and links of near-duplicate pages are not followed.
+
+        Args:
+            href (str): Full link of page.
+            html (str): Page HTML.
+
+        Returns:
+            set: Set of all relevant links found in page.
+        """
+
+        # visible text & links in one pass (same output as BeautifulSoup's get_text(strip=True) & find_all('a'))
+        with Neo.METRICS.time('parse') as timer:
+            blocks, links = extract(html, blocks=True)
+            text, duplicate = self.blocks.page(blocks)
+            if not Neo.SKIP_SEEN:
+                text = ''.join(string for block in blocks for string in block)
+            if duplicate:
+                timer.outcome = 'duplicate'
+        # call Trinity to parse page and append to results attribute
+        with Neo.METRICS.time('match') as timer:
+            trin = Trinity(text)
+            score = trin.score()
+            timer.outcome = 'hit' if score > 0 else 'zero'
+        if self.yields is not None:
+            self.yields.page(score, [f for found in (trin.disc, trin.free, trin.subs) for f in found])
+        if score > 0:
+            self.results['links'].append(href)
+            self.results['scores'].append(score)
+            self.results['discounts'].append(trin.disc)
+            self.results['freebies'].append(trin.free)
+            self.results['subscriptions'].append(trin.subs)
+        else:
+            pass
+        # links of a page with (nearly) the same content as an earlier page were found there already
+        if duplicate:
+            print(f"Near-duplicate page, not following its links: {href}")
+            return set()
+        # return canonical links, resolved against the page they're on
+        # (protocol-relative links like '//other.com/deals' pass find_hrefs but resolve to another host)
+        host = HostScheduler.host(self.resolve(self.href1))
+        hrefs = {canonicalize(link, href) for link in self.find_hrefs(links)}
+        return {h for h in hrefs if HostScheduler.host(h) == host}
+
+    def accepts(self, content_type):
+        """Returns True if a Content-Type header may hold HTML (missing header is given the benefit of the doubt)."""
+        return not content_type or any(t in content_type.lower() for t in Neo.CONTENT_TYPES)
+
+    def fetch(self, href):
+        """Downloads page HTML, streaming at most MAX_BYTES of HTML responses.
+
+        Args:
+            href (str): Full link to visit.
+
+        Returns:
+            str: Page HTML (possibly truncated), or None if there's nothing to parse (e.g. not HTML).
+
+        Raises:
+            RetryLater: On a 429 response, or if page isn't cached when replaying.
+        """
+
+        cache = Neo.CACHE
+        page = cache.get(href) if cache is not None else None
+        # offline: cached pages only, no cooldowns
+        if cache is not None and cache.replay:
+            if page is None:
+                raise RetryLater(f"Not cached: {href}")
+            return self.decode(page)
+        metrics = Neo.METRICS
+        # wait for host's cooldown (other green threads keep fetching other hosts meanwhile)
+        with metrics.time('cooldown'):
+            Neo.SCHEDULER.wait(href)
+        print(f"Visiting: {href}")
+        # will raise exception if connection times out
+        # (stream=True returns once headers are in, so this is dns + connect + tls + ttfb, which requests can't split)
+        with metrics.time('ttfb') as timer:
+            response = Neo.SESSIONS.get(href).get(href, timeout=Neo.TIMEOUT, stream=True, headers=PageCache.headers(page))
+            timer.outcome = Metrics.outcome(response.status_code)
+        with response:
+            status_code = int(response.status_code)
+            # unchanged since cached
+            if status_code == 304 and page is not None:
+                cache.revalidate()
+                return self.decode(page)
+            # don't spam
+            elif status_code == 429:
+                print(f"429 response received for {href}\nFreezing this host for {Neo.NO_SPAM/60} minutes...")
+                Neo.SCHEDULER.backoff(href, Neo.NO_SPAM)
+                raise RetryLater(f"429 response: {href}")
+            # account for bad requests
+            elif status_code > 400:
+                # end method
+                raise Exception(f"Unreachable: {href}")
+            # skip pdfs, images etc. before downloading the body
+            elif not self.accepts(response.headers.get('Content-Type')):
+                print(f"Not HTML ({response.headers.get('Content-Type')}): {href}")
+                return None
+            body = bytearray()
+            with metrics.time('download') as timer:
+                for chunk in response.iter_content(Neo.CHUNK):
+                    body.extend(chunk)
+                    if len(body) >= Neo.MAX_BYTES:
+                        print(f"Truncated at {Neo.MAX_BYTES} bytes: {href}")
+                        timer.outcome = 'truncated'
+                        break
+            body = body[:Neo.MAX_BYTES]
+            if cache is not None:
+                cache.put(href, body, response.encoding, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return self.text(body, response.encoding)
+
+    @staticmethod
+    def decode(page):
+        """Returns HTML of a page dict from PageCache.get, or None if page wasn't cached."""
+
+        if page is None:
+            return None
+        return Neo.text(page['body'], page['encoding'])
+
+    @staticmethod
+    def text(body, encoding):
+        """Returns body decoded with its charset, falling back to utf-8 for charsets Python doesn't know
+        (e.g. 'utf8mb4'), as requests' response.text does."""
+
+        try:
+            return body.decode(encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return body.decode('utf-8', errors='replace')
+
     def parse(self, href):
         """Visits the link given and appends Trinity's findings to results attribute.
         
@@ -93,65 +303,118 @@ class Neo:
         if len(href) == 0:
             return ''
         else:
-            # account for shortened internal links
-            if self.href1[-1] == '/' and href[0] == '/':
-                href = self.href1 + href[1:]
-            elif self.href1[-1] != '/' and href[0] == '/':
-                href = self.href1 + href
-            print(f"Visiting: {href}")
-            # will raise exception if connection times out
-            response = requests.get(href, timeout=5)
-            status_code = int(response.status_code)
-            # don't spam
-            if status_code == 429:
-                print(f"429 response received for {href}\nFreezing this scrape for {Neo.NO_SPAM/60} minutes...")
-                time.sleep(Neo.NO_SPAM)
+            href = self.resolve(href)
+            html = self.fetch(href)
+            if html is None:
                 return ''
-            # account for bad requests
-            elif status_code > 400:
-                # end method
-                raise Exception(f"Unreachable: {href}")
             else:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                # call Trinity to parse page and append to results attribute
-                trin = Trinity(soup.get_text(strip=True))
-                score = trin.score()
-                if score > 0:
-                    self.results['links'].append(href)
-                    self.results['scores'].append(score)
-                    self.results['discounts'].append(trin.disc)
-                    self.results['freebies'].append(trin.free)
-                    self.results['subscriptions'].append(trin.subs)
-                else:
-                    pass
-                # return list of links
-                return self.find_hrefs(soup)
+                return self.digest(href, html)
+
+    def follow(self, href):
+        """Parses a secondary link, printing rather than raising any exception.
+
+        Args:
+            href (str): Full link to visit.
+
+        Returns:
+            set: Set of all relevant links found, else empty string.
+        """
+
+        try:
+            return self.parse(href)
+        # handle exceptions & continue through frontier
+        except Exception as e:
+            print(f"Exception encountered for {href}: {e.args}")
+            return ''
 
     def execute(self):
-        """Executes Neo instance to parse any given website 2 links deep & update results attribute."""
-        
-        counter = 0
-        # any exceptions at first parse will be recorded by Celery flower as failed task (useful for calculating how many sites visited)
-        for href2 in self.parse(self.href1):
-            # if first parse successful then handle exceptions from secondary links
-            try:
-                counter += 1
-                if counter > Neo.PAGE_LIMIT:
-                    print(f'Too many pages at {self.href1}')
-                    # end method
-                    return
-                elif counter == 1:
-                    self.parse(href2)
-                else:
-                    # cooldown
-                    time.sleep(Neo.COOLDOWN)
-                    self.parse(href2)
-            # handle exceptions & continue through list
-            except Exception as e:
-                print(f"Exception encountered for {href2}: {e.args}")
-                continue
+        """Executes Neo instance to parse any given website DEPTH links deep & update results attribute.
+        Up to PARALLEL pages of the site are fetched at once (spacing is left to SCHEDULER).
+        A homepage that can't be fetched right now raises RetryLater, so the site counts as failed (not done),
+        whereas a homepage with nothing to parse (e.g. not HTML) leaves the site done with no results."""
+
+        frontier = self.frontier
+        # a restored scraper has already visited the homepage
+        if frontier.fetched == 0:
+            frontier.push([self.resolve(self.href1)], 0)
+            # any exceptions at first parse will be recorded by Celery flower as failed task (useful for calculating how many sites visited)
+            for href, level in frontier.pop():
+                frontier.push((self.resolve(h) for h in self.parse(href)), level + 1)
+                frontier.complete(href)
+            self.save()
+        # green threads are only concurrent when run in a monkey-patched (Eventlet) worker
+        # (imported here so AsyncNeo users don't load Eventlet)
+        import eventlet
+        pool = eventlet.GreenPool(Neo.PARALLEL)
+        while not frontier.done and not self.exhausted():
+            batch = frontier.pop(Neo.PARALLEL)
+            for (href, level), hrefs in zip(batch, pool.imap(self.follow, [href for href, _ in batch])):
+                frontier.push((self.resolve(h) for h in hrefs), level + 1)
+                frontier.complete(href)
+            # every page of the batch is in, so results & frontier agree
+            self.save()
+        if len(frontier) > 0 and not (self.yields is not None and self.yields.done):
+            print(f'Too many pages at {self.href1}')
+
+    def exhausted(self):
+        """Returns True if STOP says the site's pages have stopped yielding, recording fetches saved.
+        Called while pages are left to fetch, so a True ends the crawl."""
+
+        if self.yields is None or not self.yields.done:
+            return False
+        remaining = min(len(self.frontier), self.frontier.budget - self.frontier.fetched)
+        self.yields.stop(remaining)
+        print(f"Stopping early at {self.href1} ({self.yields.reason}), {remaining} fetches saved")
+        return True
+
+    def save(self):
+        """Calls checkpoint with the scraper if set."""
+
+        if self.checkpoint is not None:
+            self.checkpoint(self)
+
+    def state(self):
+        """Returns JSON encodable state of the crawl: frontier & results so far.
+        Links popped but not completed are queued again, so they are fetched again on restore."""
+
+        results = dict(self.results)
+        # Trinity findings are sets (or '' if none found), which JSON can't hold
+        for key in ('discounts', 'freebies', 'subscriptions'):
+            results[key] = [sorted(found, key=str) if isinstance(found, set) else found for found in results[key]]
+        return {'href1': self.href1,
+            'frontier': self.frontier.state(),
+            'results': results,
+            'blocks': sorted(self.blocks.seen),
+            'yields': self.yields.state() if self.yields is not None else None}
+
+    def restore(self, state):
+        """Carries on from state returned by Neo.state (call before execute).
+
+        Args:
+            state (dict): Crawl state.
+        """
+
+        self.frontier = Frontier.restore(state['frontier'], rank=Neo.LINKS.priority)
+        self.blocks = BlockFilter(state.get('blocks', ()))
+        if Neo.STOP is not None:
+            self.yields = Neo.STOP.track(state.get('yields'))
+        results = dict(state['results'])
+        for key in ('discounts', 'freebies', 'subscriptions'):
+            # JSON turns sets into lists & tuples of regex groups into lists
+            results[key] = [{tuple(f) if isinstance(f, list) else f for f in found} if isinstance(found, list) else found
+                for found in results[key]]
+        self.results = results
 
 
+def _tune_sqlite(dbapi_connection, connection_record):
+    """Sets SQLite up for many small concurrent writes: WAL lets reads carry on during writes,
+    and synchronous=NORMAL only syncs at checkpoints (safe with WAL)."""
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
 
 class Pipeline:
     """Construct to save scraper output to database.
@@ -170,14 +433,38 @@ class Pipeline:
     Attributes:
         engine (:obj: database engine): SQLAlchemy engine.
         main (:obj: database table): SQLAlchemy table object. Primary key is link of individual pages.
+        done (:obj: database table): SQLAlchemy table object of ids of sites already scraped (even with no rows saved).
+        completed (:obj: Bitmap): In-process index of done ids, warmed from database at initiation.
+        checkpoints (:obj: Checkpoints): Crawl state of unfinished sites, at CHECKPOINTS in .env (default databases/checkpoints.db).
 
     Methods:
         etl: Executes scraper and saves results to database.
-        yeet: Queries database and exports query results to csv.
+        flush: Writes buffered rows to database.
+        yeet: Queries database and exports query results to csv/parquet in chunks.
     """
 
+    # top-scoring page of each site (SQLite returns the row holding MAX(score) for bare columns)
+    TOP_PAGES = 'SELECT id, name, link, MAX(score) AS score, discounts, freebies, subscriptions FROM main GROUP BY id;'
+    # buffered rows that trigger a write
+    FLUSH_ROWS = 500
+    # secs after which buffered rows are written on next save
+    FLUSH_SECS = 5
+
     def __init__(self):
         self.engine = create_engine(config('DB_URI'))
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _tune_sqlite)
+        # latency histograms are appended to METRICS_FILE every METRICS_SECS (see scraper.metrics)
+        # (exit hooks run last to first, so the final flush below is exported too)
+        if config('METRICS_FILE', default=''):
+            Neo.METRICS.path = config('METRICS_FILE')
+            Neo.METRICS.interval = config('METRICS_SECS', default=60, cast=float)
+            atexit.register(Neo.METRICS.export)
+        # rows waiting to be written
+        self.__buffer = []
+        self.__flushed = time.monotonic()
+        # write what's left when the worker process exits
+        atexit.register(self.flush)
         metadata = MetaData()
         # declare table
         self.main = Table('main', metadata,
@@ -187,9 +474,27 @@ class Pipeline:
             Column('score', Integer),
             Column('discounts', String),
             Column('freebies', String),
-            Column('subscriptions', String))
+            Column('subscriptions', String),
+            # lets per-site queries (e.g. TOP_PAGES) read sites in order without sorting the table
+            Index('ix_main_id_score', 'id', 'score'))
+        self.done = Table('done', metadata,
+            Column('id', Integer, primary_key=True))
         # generates table (will not override existing)
         metadata.create_all(self.engine)
+        # create_all skips indexes of tables that already exist
+        for ix in self.main.indexes:
+            ix.create(self.engine, checkfirst=True)
+        # warm skip check (main covers databases saved before the done table existed)
+        self.completed = Bitmap(row[0] for row in self.engine.execute(
+            "SELECT id FROM done UNION SELECT DISTINCT id FROM main WHERE id >= 0"))
+        self.__done = []
+        # page-level state of sites still being crawled, so a restarted worker resumes them mid-site
+        self.checkpoints = Checkpoints(config('CHECKPOINTS', default='databases/checkpoints.db'))
+        # fetched pages are kept on disk if CACHE_DIR is set (REPLAY=True runs offline from it)
+        if config('CACHE_DIR', default=''):
+            Neo.CACHE = PageCache(config('CACHE_DIR'),
+                max_bytes=config('CACHE_BYTES', default=4 * 1024**3, cast=int),
+                replay=config('REPLAY', default=False, cast=bool))
 
     def __clean(self, results, targets={'scores'}):
         """Private method to clean result dict of duplicate values, keeping first of each
@@ -220,63 +525,220 @@ class Pipeline:
         
         Args:
             link (str): Link to website. 
-            id (int, optional): ID for website (not primary key in database since multiple pages share same ID). Default is 0.
+            id (int, optional): Non-negative ID for website (not primary key in database since multiple pages share same ID). Default is 0.
             name (str, optional): Name of website. Default is 'website'.
             scraper (:obj: module, optional): Scraper module to load. Default is Neo.
         
         Returns:
             None, saves scraped data to database file.
         """
-        # check params before initiating
-        if isinstance(link, str) and isinstance(id, int) and isinstance(name, str):
-            pass
-        else:
-            raise ValueError("Please specify args in correct format")
+        self._check(link, id, name)
         # quick check to speed up runtime by not scraping duplicates
-        if self.engine.execute(f"SELECT COUNT(*) FROM main WHERE id = {id}").fetchall()[0][0] > 0:
+        if self._saved(id):
             print(f"Already saved & moving on: {link}")
             # end method
             return
         else:
-            scrape = scraper(link)
-            scrape.execute()
-        # filter to see if we have results
-        r_len = len(scrape.results['links'])
-        if r_len > 0:
-            for i in self.__clean(scrape.results):
-                # try inserting into db except if integrity error occurs
-                try:
-                    href = scrape.results['links'][i]
-                    stmt = insert(self.main).values(
-                        id=id, 
-                        name=name, 
-                        link=href,
-                        score=scrape.results['scores'][i],
-                        discounts=str(scrape.results['discounts'][i]),
-                        freebies=str(scrape.results['freebies'][i]),
-                        subscriptions=str(scrape.results['subscriptions'][i])
-                        )
-                    self.engine.execute(stmt)
-                    print(f"Successfully saved: {href}")
-                except exc.IntegrityError as e:
-                    print(f"Encountered SQL integrity error for {stmt}: {e.args}")
-                    continue
+            scrape = self._resume(scraper(link), id)
+            with Neo.METRICS.time('site'):
+                scrape.execute()
+        self._save(scrape.results, id, name)
+
+    def _check(self, link, id, name):
+        """Checks etl params before initiating.
+        Ids must be non-negative to be marked done (see Bitmap), so others are rejected before crawling."""
+
+        if isinstance(link, str) and isinstance(id, int) and isinstance(name, str):
+            pass
+        else:
+            raise ValueError("Please specify args in correct format")
+        if id < 0:
+            raise ValueError(f"Site id must be non-negative: {id}")
+
+    def _resume(self, scrape, id):
+        """Restores a scraper from the site's checkpoint if there is one & has it checkpoint after every batch of pages.
+
+        Args:
+            scrape (:obj: Neo): Scraper not yet executed.
+            id (int): ID for website.
+
+        Returns:
+            :obj: Neo: Same scraper.
+        """
+
+        state = self.checkpoints.load(id)
+        if state is not None and state['href1'] == scrape.href1:
+            print(f"Resuming from page {state['frontier']['fetched'] + 1}: {scrape.href1}")
+            scrape.restore(state)
+        scrape.checkpoint = lambda s: self.checkpoints.save(id, s.state())
+        return scrape
+
+    def _saved(self, id):
+        """Returns True if site with given id has already been scraped (O(1), no database query).
+        Replaying from the cache re-scores every site, so none count as saved."""
+
+        if self._replaying():
+            return False
+        return id in self.completed
+
+    def _replaying(self):
+        """Returns True if pages are read from Neo.CACHE only (REPLAY=True), i.e. sites are being re-scored."""
+        return Neo.CACHE is not None and Neo.CACHE.replay
+
+    def _save(self, results, id, name):
+        """Buffers unique rows of a scraper's results dict & marks site as done,
+        flushing when FLUSH_ROWS or FLUSH_SECS is reached.
+
+        Args:
+            results (dict): Results attribute of Neo-like scraper.
+            id (int): ID for website.
+            name (str): Name of website.
+        """
+
+        for i in self.__clean(results):
+            self.__buffer.append({'id': id,
+                'name': name,
+                'link': results['links'][i],
+                'score': results['scores'][i],
+                'discounts': str(results['discounts'][i]),
+                'freebies': str(results['freebies'][i]),
+                'subscriptions': str(results['subscriptions'][i])})
+        # record site even if it had no results so it isn't scraped again after a restart
+        self.completed.add(id)
+        self.__done.append({'id': id})
+        if len(self.__buffer) >= Pipeline.FLUSH_ROWS or time.monotonic() - self.__flushed >= Pipeline.FLUSH_SECS:
+            self.flush()
+
+    def __upsert(self, table, key, update=False):
+        """Returns insert statement for table that skips rows whose key is already saved
+        (or overwrites them if update is True)."""
+
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            stmt = sqlite.insert(table)
+        elif dialect == 'postgresql':
+            stmt = postgresql.insert(table)
         else:
+            return insert(table)
+        if update:
+            return stmt.on_conflict_do_update(index_elements=[key],
+                set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != key})
+        return stmt.on_conflict_do_nothing(index_elements=[key])
+
+    def flush(self):
+        """Writes all buffered rows & done ids to database in one transaction using executemany.
+        Rows are put back in the buffer if the write fails.
+        When replaying, sites' old rows are replaced by their re-scored rows."""
+
+        # swap buffers before any IO so green threads keep appending to fresh ones
+        rows, self.__buffer = self.__buffer, []
+        done, self.__done = self.__done, []
+        self.__flushed = time.monotonic()
+        if not rows and not done:
             return
+        replay = self._replaying()
+        try:
+            with Neo.METRICS.time('flush'), self.engine.begin() as conn:
+                # a site's rows & done id are buffered together, so old rows of every re-scored site go here
+                # (pages that no longer score mustn't keep their old row)
+                if replay and done:
+                    conn.execute(self.main.delete().where(self.main.c.id.in_([row['id'] for row in done])))
+                if rows:
+                    conn.execute(self.__upsert(self.main, 'link', update=replay), rows)
+                if done:
+                    conn.execute(self.__upsert(self.done, 'id'), done)
+            print(f"Flushed {len(rows)} rows & {len(done)} sites to database")
+            # checkpoints are only dropped once a site's rows are safely written
+            for row in done:
+                self.checkpoints.drop(row['id'])
+        except exc.SQLAlchemyError as e:
+            print(f"Encountered SQL error saving {len(rows)} rows: {e.args}")
+            self.__buffer = rows + self.__buffer
+            self.__done = done + self.__done
+            raise
+
+    def yeet(self, filepath, query='SELECT * FROM main;', index=False, chunksize=10000, partition=None):
+        """Extracts items from database in chunks using pandas read_sql and writes each chunk out as it's read,
+        so memory stays flat however big the query result is.
+        Output format follows filepath: .csv, compressed .csv.gz or columnar .parquet (needs pyarrow).
 
-    def yeet(self, filepath, query='SELECT * FROM main;', index=False):
-        """Extracts items from database using pandas read_sql and exports to csv file.
+        Use:
+            pipe.yeet('final.csv.gz')
+            # one file per 100k rows: final-0000.parquet, final-0001.parquet, ...
+            pipe.yeet('final.parquet', partition=100000)
+            # best page per site only
+            pipe.yeet('top.csv', query=Pipeline.TOP_PAGES)
         
         Args:
             filepath (str): Path to save file.
             query (str, optional): SQL query. Default is 'SELECT * FROM main;'.
             index (bool, optional): Whether to keep DataFrame index. Default is False.
+            chunksize (int, optional): Rows read & written at a time. Default is 10000.
+            partition (int, optional): Rows per output file, numbered from 0000. Default is None (single file).
 
         Returns:
-            None, outputs csv file in filepath location.
+            None, outputs file(s) in filepath location.
         """
 
+        # imported here so workers don't pay for pandas at startup
+        import pandas as pd
+        self.flush()
         print(f"Yeeting selected data to: {filepath}")
-        df = pd.read_sql(query, con=self.engine)
-        df.to_csv(filepath, mode='wb', encoding='utf-8-sig', index=index)
-        print("Kobe!")
\ No newline at end of file
+        chunks = pd.read_sql(query, con=self.engine, chunksize=partition or chunksize)
+        if filepath.endswith('.parquet'):
+            self.__yeet_parquet(chunks, filepath, index, partition)
+        else:
+            self.__yeet_csv(chunks, filepath, index, partition)
+        print("Kobe!")
+
+    @staticmethod
+    def __part(filepath, n, partition):
+        """Returns path of nth output file ('final.csv.gz' -> 'final-0001.csv.gz') if partitioning."""
+        if not partition:
+            return filepath
+        folder, name = os.path.split(filepath)
+        stem, dot, suffix = name.partition('.')
+        return os.path.join(folder, f"{stem}-{n:04d}{dot}{suffix}")
+
+    def __yeet_csv(self, chunks, filepath, index, partition):
+        f = None
+        try:
+            for n, df in enumerate(chunks):
+                if f is None or partition:
+                    if f is not None:
+                        f.close()
+                    path = self.__part(filepath, n, partition)
+                    if path.endswith('.gz'):
+                        f = gzip.open(path, 'wt', encoding='utf-8-sig', newline='')
+                    else:
+                        f = open(path, 'w', encoding='utf-8-sig', newline='')
+                    header = True
+                df.to_csv(f, header=header, index=index)
+                header = False
+        finally:
+            if f is not None:
+                f.close()
+
+    def __yeet_parquet(self, chunks, filepath, index, partition):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: $ pip install pyarrow")
+        writer = None
+        try:
+            for n, df in enumerate(chunks):
+                # string dtype keeps all-null text columns typed the same in every chunk
+                for col in df.columns[df.dtypes == object]:
+                    df[col] = df[col].astype('string')
+                if writer is None or partition:
+                    if writer is not None:
+                        writer.close()
+                    table = pa.Table.from_pandas(df, preserve_index=index)
+                    writer = pq.ParquetWriter(self.__part(filepath, n, partition), table.schema)
+                else:
+                    table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=index)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
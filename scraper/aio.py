@@ -0,0 +1,279 @@
+"""Asyncio versions of Neo & Pipeline using aiohttp instead of blocking requests.
+
+Neo under Eventlet holds a green thread per site for its whole crawl (up to ~80s of cooldowns),
+and real concurrency tops out at around 2,500 (see speed_tests/scale_test.py). Here cooldowns are
+cheap coroutine sleeps and sockets are shared through one connection pool, so a single process
+can keep tens of thousands of sites in flight. Results dict & Trinity scoring are shared with Neo.
+
+Use:
+    rows = [{'url': 'https://en.wikipedia.org/wiki/The_Matrix', 'id': 1, 'name': 'Wikipedia'}]
+    pipe = AsyncPipeline()
+    pipe.start(rows)
+    pipe.yeet('saved_data.csv')
+"""
+
+import asyncio
+import time
+import aiohttp
+from scraper import Neo, Pipeline, RetryLater
+from scraper.cache import PageCache
+from scraper.metrics import Metrics
+
+
+def traces(metrics):
+    """Returns aiohttp TraceConfig recording dns & connect phases (TLS handshake included) in metrics.
+    Reused keep-alive connections record neither."""
+
+    trace = aiohttp.TraceConfig()
+
+    def start(attr):
+        async def on_start(session, ctx, params):
+            setattr(ctx, attr, time.perf_counter())
+        return on_start
+
+    def end(attr, phase):
+        async def on_end(session, ctx, params):
+            metrics.observe(phase, time.perf_counter() - getattr(ctx, attr))
+        return on_end
+
+    trace.on_dns_resolvehost_start.append(start('dns'))
+    trace.on_dns_resolvehost_end.append(end('dns', 'dns'))
+    trace.on_connection_create_start.append(start('connect'))
+    trace.on_connection_create_end.append(end('connect', 'connect'))
+    return trace
+
+
+class AsyncNeo(Neo):
+    """Neo with non-blocking page visits. Must be executed inside a running event loop.
+
+    Use:
+        async with aiohttp.ClientSession() as session:
+            scraper = AsyncNeo(link, session)
+            await scraper.execute()
+            results = scraper.results
+
+    Args:
+        href1 (str): Initial (1st) link.
+        session (:obj: aiohttp.ClientSession): Session shared by all scrapers in the event loop.
+
+    Attributes:
+        href1 (str): Initial (1st) link.
+        session (:obj: aiohttp.ClientSession): Shared session.
+        results (dict): Dictionary of results for each page, able to be turned into DataFrame.
+
+    Methods:
+        fetch: Downloads page HTML or reads it from Neo.CACHE (coroutine).
+        parse: Parses page and append to results (coroutine).
+        follow: Parses secondary page, printing any exception (coroutine).
+        execute: Execute scraper instance (coroutine).
+    """
+
+    def __init__(self, href1, session):
+        super().__init__(href1)
+        self.session = session
+
+    async def fetch(self, href):
+        """Downloads page HTML, streaming at most MAX_BYTES of HTML responses.
+
+        Args:
+            href (str): Full link to visit.
+
+        Returns:
+            str: Page HTML (possibly truncated), or None if there's nothing to parse (e.g. not HTML).
+
+        Raises:
+            RetryLater: On a 429 response, or if page isn't cached when replaying.
+        """
+
+        # cache index & bodies are small local reads, so they're not worth a thread
+        cache = Neo.CACHE
+        page = cache.get(href) if cache is not None else None
+        if cache is not None and cache.replay:
+            if page is None:
+                raise RetryLater(f"Not cached: {href}")
+            return self.decode(page)
+        metrics = Neo.METRICS
+        # wait for host's cooldown without holding up other sites
+        with metrics.time('cooldown'):
+            await asyncio.sleep(Neo.SCHEDULER.reserve(href))
+        print(f"Visiting: {href}")
+        # will raise exception if connection times out
+        # (dns & connect of new connections are also recorded on their own by traces)
+        with metrics.time('ttfb') as timer:
+            response = await self.session.get(href, timeout=aiohttp.ClientTimeout(total=Neo.TIMEOUT), headers=PageCache.headers(page))
+            timer.outcome = Metrics.outcome(response.status)
+        async with response:
+            status_code = int(response.status)
+            if status_code == 304 and page is not None:
+                cache.revalidate()
+                return self.decode(page)
+            # don't spam
+            elif status_code == 429:
+                print(f"429 response received for {href}\nFreezing this host for {Neo.NO_SPAM/60} minutes...")
+                Neo.SCHEDULER.backoff(href, Neo.NO_SPAM)
+                raise RetryLater(f"429 response: {href}")
+            # account for bad requests
+            elif status_code > 400:
+                raise Exception(f"Unreachable: {href}")
+            # skip pdfs, images etc. before downloading the body
+            elif not self.accepts(response.headers.get('Content-Type')):
+                print(f"Not HTML ({response.headers.get('Content-Type')}): {href}")
+                return None
+            body = bytearray()
+            with metrics.time('download') as timer:
+                async for chunk in response.content.iter_chunked(Neo.CHUNK):
+                    body.extend(chunk)
+                    if len(body) >= Neo.MAX_BYTES:
+                        print(f"Truncated at {Neo.MAX_BYTES} bytes: {href}")
+                        timer.outcome = 'truncated'
+                        break
+            body = body[:Neo.MAX_BYTES]
+            if cache is not None:
+                cache.put(href, body, response.charset, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return self.text(body, response.charset)
+
+    async def parse(self, href):
+        """Visits the link given and appends Trinity's findings to results attribute.
+
+        Args:
+            href (str): Link to visit.
+
+        Returns:
+            set: Set of all links in the page if page visited successfully, else empty string.
+        """
+
+        # stop if no link loaded
+        if len(href) == 0:
+            return ''
+        href = self.resolve(href)
+        html = await self.fetch(href)
+        if html is None:
+            return ''
+        return self.digest(href, html)
+
+    async def follow(self, href):
+        """Parses a secondary link, printing rather than raising any exception."""
+
+        try:
+            return await self.parse(href)
+        except Exception as e:
+            print(f"Exception encountered for {href}: {e.args}")
+            return ''
+
+    async def execute(self):
+        """Executes AsyncNeo instance to parse any given website DEPTH links deep & update results attribute.
+        Up to PARALLEL pages of the site are fetched at once (spacing is left to SCHEDULER)."""
+
+        frontier = self.frontier
+        # a restored scraper has already visited the homepage
+        if frontier.fetched == 0:
+            frontier.push([self.resolve(self.href1)], 0)
+            # any exceptions at first parse are raised to the caller like in Neo
+            for href, level in frontier.pop():
+                frontier.push((self.resolve(h) for h in await self.parse(href)), level + 1)
+                frontier.complete(href)
+            self.save()
+        while not frontier.done and not self.exhausted():
+            batch = frontier.pop(Neo.PARALLEL)
+            found = await asyncio.gather(*(self.follow(href) for href, _ in batch))
+            for (href, level), hrefs in zip(batch, found):
+                frontier.push((self.resolve(h) for h in hrefs), level + 1)
+                frontier.complete(href)
+            self.save()
+        if len(frontier) > 0 and not (self.yields is not None and self.yields.done):
+            print(f'Too many pages at {self.href1}')
+
+
+class AsyncPipeline(Pipeline):
+    """Pipeline that runs many AsyncNeo scrapers concurrently in one event loop.
+    Database writes reuse Pipeline's engine & table.
+
+    Use:
+        pipe = AsyncPipeline()
+        pipe.start([{'url': link, 'id': 1, 'name': 'Wikipedia'}, ...])
+
+    Args:
+        None.
+
+    Attributes:
+        engine (:obj: database engine): SQLAlchemy engine.
+        main (:obj: database table): SQLAlchemy table object.
+
+    Methods:
+        etl: Executes async scraper and saves results to database (coroutine).
+        run: Runs etl for an iterable of site rows (coroutine).
+        start: Blocking entry point for run.
+    """
+
+    # max sites in flight at once
+    SITES = 20000
+    # max open connections shared by all sites (most sites are cooling down at any moment)
+    CONNECTIONS = 1000
+    # max open connections per host
+    CONNECTIONS_PER_HOST = Neo.PARALLEL
+
+    async def etl(self, link, session, id=0, name='website', scraper=AsyncNeo):
+        """Extracts information from web link using AsyncNeo-like scraper and saves to database.
+
+        Args:
+            link (str): Link to website.
+            session (:obj: aiohttp.ClientSession): Shared session.
+            id (int, optional): Non-negative ID for website. Default is 0.
+            name (str, optional): Name of website. Default is 'website'.
+            scraper (:obj: module, optional): Scraper module to load. Default is AsyncNeo.
+
+        Returns:
+            None, saves scraped data to database file.
+        """
+
+        self._check(link, id, name)
+        if self._saved(id):
+            print(f"Already saved & moving on: {link}")
+            return
+        scrape = self._resume(scraper(link, session), id)
+        with Neo.METRICS.time('site'):
+            await scrape.execute()
+        self._save(scrape.results, id, name)
+
+    async def run(self, rows, sites=None):
+        """Runs etl for all rows with at most `sites` scrapes in flight.
+        Exceptions for individual sites are printed and counted rather than raised.
+
+        Args:
+            rows (iterable): Dicts (or pandas rows) with 'url', 'id' and 'name' keys.
+            sites (int, optional): Max sites in flight. Default is AsyncPipeline.SITES.
+
+        Returns:
+            tuple: Number of (completed, failed) sites.
+        """
+
+        limit = asyncio.Semaphore(sites or AsyncPipeline.SITES)
+        connector = aiohttp.TCPConnector(limit=AsyncPipeline.CONNECTIONS,
+            limit_per_host=AsyncPipeline.CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60)
+        completed = 0
+        failed = 0
+
+        async def task(row, session):
+            nonlocal completed, failed
+            async with limit:
+                try:
+                    await self.etl(row['url'], session, id=int(row['id']), name=row['name'])
+                    completed += 1
+                except Exception as e:
+                    print(f"Exception encountered for {row['url']}: {e.args}")
+                    failed += 1
+
+        async with aiohttp.ClientSession(connector=connector, trace_configs=[traces(Neo.METRICS)]) as session:
+            await asyncio.gather(*(task(row, session) for row in rows))
+        self.flush()
+        print(f"Completed: {completed}, failed: {failed}")
+        if Neo.STOP is not None:
+            print(f"Early stopping: {Neo.STOP.stats()}")
+        return completed, failed
+
+    def start(self, rows, sites=None):
+        """Blocking wrapper around run for use in scripts."""
+
+        return asyncio.run(self.run(rows, sites))
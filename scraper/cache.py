@@ -0,0 +1,213 @@
+"""On-disk cache of fetched pages so sites can be re-scored without re-crawling them.
+
+Neo kept nothing it fetched, so changing one pattern in regex meant crawling all 48k sites again.
+PageCache keeps each page's (possibly truncated) body zlib compressed under the SHA-1 of its content,
+so identical pages at different links are stored once, with a small SQLite index from canonical link
+to body, encoding & validators (ETag / Last-Modified). Least recently used pages are evicted once
+bodies take up more than max_bytes.
+
+In replay mode scrapers read pages from the cache only and never touch the network (nor wait for
+host cooldowns). Otherwise cached validators are sent as If-None-Match / If-Modified-Since, and
+a 304 Not Modified response is answered from the cache without downloading the page again.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from scraper.urls import canonicalize
+
+
+class PageCache:
+    """Content-addressed, compressed page store with LRU eviction. Safe to share between worker processes on one machine.
+
+    Use:
+        cache = PageCache('databases/cache', max_bytes=4 * 1024**3)
+        cache.put(href, body, encoding='utf-8', etag='"abc"')
+        page = cache.get(href)
+        html = page['body'].decode(page['encoding'] or 'utf-8', errors='replace')
+
+    Args:
+        path (str): Directory of cache (created if missing).
+        max_bytes (int, optional): Max compressed bytes of stored bodies. Default is 4 GiB.
+        replay (bool, optional): Whether scrapers should serve pages from cache only. Default is False.
+
+    Attributes:
+        path (str): Directory of cache.
+        max_bytes (int): Max compressed bytes of stored bodies.
+        replay (bool): Whether scrapers serve pages from cache only.
+        hits (int): Pages found in cache.
+        misses (int): Pages not in cache.
+        revalidated (int): Cached pages confirmed unchanged by a 304 response.
+        skipped (int): Index writes skipped because another worker held the write lock.
+
+    Methods:
+        key: Returns canonical cache key of a link (staticmethod).
+        get: Returns cached page of a link, else None.
+        put: Stores page body of a link.
+        headers: Returns conditional request headers for a cached page (staticmethod).
+        revalidate: Records a 304 response for a cached page.
+        stats: Returns cache metrics.
+    """
+
+    # share of max_bytes kept after eviction (so eviction doesn't run on every put once full)
+    LOW_WATER = 0.9
+    # secs to wait for another worker's write lock (blocks the whole Eventlet hub / event loop meanwhile)
+    TIMEOUT = 0.2
+
+    def __init__(self, path, max_bytes=4 * 1024**3, replay=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.skipped = 0
+        os.makedirs(path, exist_ok=True)
+        # autocommit, waiting only briefly if another worker is writing (WAL readers never wait)
+        self.__db = sqlite3.connect(os.path.join(path, 'index.db'), timeout=PageCache.TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.execute('CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, digest TEXT, encoding TEXT, etag TEXT, modified TEXT, used REAL)')
+        self.__db.execute('CREATE TABLE IF NOT EXISTS bodies (digest TEXT PRIMARY KEY, size INTEGER)')
+        self.__db.execute('CREATE INDEX IF NOT EXISTS ix_pages_used ON pages (used)')
+        self.__db.execute('CREATE INDEX IF NOT EXISTS ix_pages_digest ON pages (digest)')
+        # running total of stored bytes (re-read from index before evicting, as other processes write too)
+        self.__bytes = self.__db.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+
+    def __len__(self):
+        return self.__db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    @staticmethod
+    def key(href):
+        """Returns canonical cache key of a link (see scraper.urls)."""
+        return canonicalize(href)
+
+    def __file(self, digest):
+        # 256 subdirectories keep directory listings small
+        return os.path.join(self.path, digest[:2], digest + '.z')
+
+    def get(self, href):
+        """Returns cached page of a link as a dict with 'body' (bytes), 'encoding', 'etag' & 'modified' keys, else None."""
+
+        key = PageCache.key(href)
+        row = self.__db.execute('SELECT digest, encoding, etag, modified FROM pages WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            try:
+                with open(self.__file(row[0]), 'rb') as f:
+                    body = zlib.decompress(f.read())
+            # body evicted by another process since the lookup
+            except (OSError, zlib.error):
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # a skipped update only makes the page look older to eviction
+        self.__try(lambda: self.__db.execute('UPDATE pages SET used = ? WHERE key = ?', (time.time(), key)))
+        return {'body': body, 'encoding': row[1], 'etag': row[2], 'modified': row[3]}
+
+    def put(self, href, body, encoding=None, etag=None, modified=None):
+        """Stores page body of a link, replacing any previous version.
+
+        Args:
+            href (str): Link of page.
+            body (bytes): Page body as downloaded.
+            encoding (str, optional): Charset of body. Default is None.
+            etag (str, optional): ETag response header. Default is None.
+            modified (str, optional): Last-Modified response header. Default is None.
+        """
+
+        body = bytes(body)
+        digest = hashlib.sha1(body).hexdigest()
+        file = self.__file(digest)
+        if not os.path.exists(file):
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            # write then rename so readers never see a partial body
+            temp = f"{file}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                f.write(zlib.compress(body))
+            os.replace(temp, file)
+        size = os.path.getsize(file)
+        # a skipped put only means the page is fetched again next time
+        self.__try(lambda: self.__index(href, digest, size, encoding, etag, modified))
+
+    def __index(self, href, digest, size, encoding, etag, modified):
+        """Adds a stored body to the index & evicts if over max_bytes."""
+
+        key = PageCache.key(href)
+        previous = self.__db.execute('SELECT digest FROM pages WHERE key = ?', (key,)).fetchone()
+        if self.__db.execute('INSERT OR IGNORE INTO bodies (digest, size) VALUES (?, ?)', (digest, size)).rowcount:
+            self.__bytes += size
+        self.__db.execute('INSERT OR REPLACE INTO pages (key, digest, encoding, etag, modified, used) VALUES (?, ?, ?, ?, ?, ?)',
+            (key, digest, encoding, etag, modified, time.time()))
+        # page changed since it was cached: its old body is only worth keeping if another page shares it
+        if previous is not None and previous[0] != digest:
+            self.__drop(previous[0])
+        if self.__bytes > self.max_bytes:
+            self.__evict()
+
+    def __try(self, write):
+        """Runs an index write, skipping it if another worker holds the lock past TIMEOUT."""
+
+        try:
+            write()
+        except sqlite3.OperationalError as e:
+            self.skipped += 1
+            print(f"Page cache write skipped: {e.args}")
+
+    @staticmethod
+    def headers(page):
+        """Returns conditional request headers for a cached page (empty dict if page is None or has no validators)."""
+
+        headers = {}
+        if page is not None:
+            if page['etag']:
+                headers['If-None-Match'] = page['etag']
+            if page['modified']:
+                headers['If-Modified-Since'] = page['modified']
+        return headers
+
+    def revalidate(self):
+        """Records a 304 Not Modified response for a cached page (already marked as used by get)."""
+        self.revalidated += 1
+
+    def __evict(self):
+        """Deletes least recently used pages (and bodies no other page shares) until under LOW_WATER of max_bytes."""
+
+        self.__bytes = self.__db.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+        target = self.max_bytes * PageCache.LOW_WATER
+        while self.__bytes > target:
+            oldest = self.__db.execute('SELECT key, digest FROM pages ORDER BY used LIMIT 100').fetchall()
+            if not oldest:
+                break
+            for key, digest in oldest:
+                self.__db.execute('DELETE FROM pages WHERE key = ?', (key,))
+                self.__drop(digest)
+                if self.__bytes <= target:
+                    break
+
+    def __drop(self, digest):
+        """Deletes a body (index row & file) if no page refers to it any more."""
+
+        if self.__db.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (digest,)).fetchone() is not None:
+            return
+        size = self.__db.execute('SELECT size FROM bodies WHERE digest = ?', (digest,)).fetchone()
+        self.__db.execute('DELETE FROM bodies WHERE digest = ?', (digest,))
+        if size is not None:
+            self.__bytes -= size[0]
+        try:
+            os.remove(self.__file(digest))
+        except OSError:
+            pass
+
+    def stats(self):
+        """Returns dict of cache metrics."""
+
+        return {'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'skipped': self.skipped,
+            'pages': len(self),
+            'bytes': self.__bytes}
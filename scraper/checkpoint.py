@@ -0,0 +1,73 @@
+"""Page-level crawl checkpoints kept in a local SQLite file.
+
+Pipeline only knows whether a whole site is done, so a site interrupted on page 12 of 16 would be
+crawled again from its homepage. Checkpoints keep each unfinished site's frontier & partial results
+(zlib compressed JSON, a few KB per site) so a restarted worker carries on from the next page.
+"""
+
+import json
+import sqlite3
+import zlib
+
+
+class Checkpoints:
+    """Store of per-site crawl state keyed by site id. Safe to share between worker processes on one machine.
+
+    Use:
+        checkpoints = Checkpoints('databases/checkpoints.db')
+        state = checkpoints.load(id)
+        checkpoints.save(id, scraper.state())
+        checkpoints.drop(id)
+
+    Args:
+        path (str): Path of SQLite file (created if missing).
+
+    Attributes:
+        path (str): Path of SQLite file.
+        skipped (int): Saves & drops skipped because another worker held the write lock.
+
+    Methods:
+        load: Returns state saved for a site, else None.
+        save: Saves state of a site.
+        drop: Deletes state of a finished site.
+    """
+
+    # secs to wait for another worker's write lock (blocks the whole Eventlet hub / event loop meanwhile)
+    TIMEOUT = 0.2
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped = 0
+        # autocommit, waiting only briefly if another worker is writing (WAL readers never wait)
+        self.__db = sqlite3.connect(path, timeout=Checkpoints.TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.execute('CREATE TABLE IF NOT EXISTS checkpoints (id INTEGER PRIMARY KEY, state BLOB)')
+
+    def __len__(self):
+        return self.__db.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+
+    def load(self, id):
+        """Returns state dict saved for site id, else None."""
+        row = self.__db.execute('SELECT state FROM checkpoints WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def save(self, id, state):
+        """Saves JSON encodable state dict for site id, replacing any previous one.
+        Skipped if the file stays locked past TIMEOUT (the site's next batch saves again)."""
+        blob = zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+        self.__write('INSERT OR REPLACE INTO checkpoints (id, state) VALUES (?, ?)', (id, blob))
+
+    def drop(self, id):
+        """Deletes state of site id once its results are saved.
+        Skipped if the file stays locked past TIMEOUT (a leftover checkpoint of a done site is never loaded)."""
+        self.__write('DELETE FROM checkpoints WHERE id = ?', (id,))
+
+    def __write(self, sql, params):
+        try:
+            self.__db.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            self.skipped += 1
+            print(f"Checkpoint write skipped: {e.args}")
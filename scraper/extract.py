@@ -0,0 +1,140 @@
+"""Single-pass page text & link extraction without building a BeautifulSoup tree.
+
+BeautifulSoup builds a full DOM and Neo then walked it twice (get_text & find_all). PageExtractor
+listens to the same html.parser tokenizer events BeautifulSoup's html.parser builder uses, so it
+returns the same stripped strings as soup.get_text(strip=True) and the same hrefs as
+soup.find_all('a', href=True), but in one pass and with nothing kept but the output.
+"""
+
+import re
+from html import unescape
+from html.entities import html5
+from html.parser import HTMLParser
+
+# text inside these tags is not returned by BeautifulSoup's get_text
+HIDDEN = {'script', 'style', 'template'}
+# tags that start or end a block of text (e.g. a nav item, banner or paragraph)
+BLOCKS = {'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'dialog', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th', 'tr', 'ul'}
+# leading number of an unterminated numeric character reference & the data after it
+_DECIMAL = re.compile(r"(\d+)(.*)", re.S)
+_HEX = re.compile(r"([0-9a-f]+)(.*)", re.S | re.I)
+
+
+class PageExtractor(HTMLParser):
+    """Streaming tokenizer that collects visible strings & anchor hrefs of a page.
+
+    Use:
+        parser = PageExtractor()
+        parser.feed(html)
+        parser.close()
+        text = ''.join(parser.strings)
+        hrefs = parser.hrefs
+
+    Attributes:
+        strings (list): Stripped non-empty text nodes in document order.
+        hrefs (list): href of every <a> tag that has one, in document order.
+        breaks (list): Indexes of strings at which a block of text starts.
+    """
+
+    def __init__(self):
+        # character references are resolved below the same way BeautifulSoup does
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        self.hrefs = []
+        self.breaks = []
+        # text node being built (tokenizer may hand over a node in several pieces)
+        self.__buffer = []
+        # depth inside hidden tags
+        self.__hidden = 0
+
+    def __flush(self):
+        if self.__buffer:
+            string = ''.join(self.__buffer).strip()
+            if string and not self.__hidden:
+                self.strings.append(string)
+            self.__buffer = []
+
+    def __break(self):
+        if not self.breaks or self.breaks[-1] != len(self.strings):
+            self.breaks.append(len(self.strings))
+
+    def handle_starttag(self, tag, attrs):
+        self.__flush()
+        if tag in BLOCKS:
+            self.__break()
+        if tag in HIDDEN:
+            self.__hidden += 1
+        elif tag == 'a':
+            href = None
+            # last duplicate attribute wins, as in BeautifulSoup
+            for name, value in attrs:
+                if name == 'href':
+                    href = value or ''
+            if href is not None:
+                self.hrefs.append(href)
+
+    def handle_endtag(self, tag):
+        self.__flush()
+        if tag in BLOCKS:
+            self.__break()
+        if tag in HIDDEN and self.__hidden:
+            self.__hidden -= 1
+
+    def handle_data(self, data):
+        self.__buffer.append(data)
+
+    def handle_entityref(self, name):
+        character = html5.get(name + ';')
+        self.__buffer.append(character if character is not None else '&' + name)
+
+    def handle_charref(self, name):
+        found = (_HEX.match(name[1:]) if name[:1] in 'xX' else _DECIMAL.match(name)) if name else None
+        if found is None:
+            self.__buffer.append(name)
+        else:
+            number = int(found.group(1), 16 if name[:1] in 'xX' else 10)
+            # html.unescape maps windows-1252 codes & invalid numbers like BeautifulSoup's UnicodeDammit
+            self.__buffer.append(unescape(f"&#{number};") + found.group(2))
+
+    def handle_comment(self, data):
+        self.__flush()
+
+    def handle_decl(self, decl):
+        self.__flush()
+
+    def handle_pi(self, data):
+        self.__flush()
+
+    def unknown_decl(self, data):
+        self.__flush()
+        # CDATA sections are kept as text by BeautifulSoup
+        if data.startswith('CDATA['):
+            self.__buffer.append(data[6:])
+            self.__flush()
+
+    def close(self):
+        super().close()
+        self.__flush()
+
+
+def extract(html, blocks=False):
+    """Returns visible strings & anchor hrefs of page HTML in one pass.
+
+    Args:
+        html (str): Page HTML.
+        blocks (bool, optional): Whether to group strings into blocks split at block-level tags. Default is False.
+
+    Returns:
+        tuple: (strings, hrefs) lists. ''.join(strings) equals BeautifulSoup's get_text(strip=True).
+            With blocks, strings is a list of non-empty lists of strings instead.
+    """
+
+    parser = PageExtractor()
+    parser.feed(html)
+    parser.close()
+    if not blocks:
+        return parser.strings, parser.hrefs
+    bounds = [0] + parser.breaks + [len(parser.strings)]
+    return [parser.strings[a:b] for a, b in zip(bounds, bounds[1:]) if b > a], parser.hrefs
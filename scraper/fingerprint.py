@@ -0,0 +1,122 @@
+"""Per-site fingerprints of text blocks, so text repeated across a site's pages is scored once.
+
+A site's pages share their header, nav, footer & newsletter banner, so Trinity rescanned the same
+text on every page and a 'subscribe' or 'free delivery' banner counted once per page. BlockFilter
+keeps a 64-bit hash of every text block (see scraper.extract) seen on a site, and passes on only
+blocks its earlier pages didn't have. Text around a skipped block is joined with a newline, so no
+match can be stitched together across it.
+
+The same hashes tell near-duplicate pages apart (e.g. one listing under two links, or sorted & paged
+variants): a page is a near-duplicate of an earlier page if blocks they share hold at least NEAR of
+the text of the longer one. That reuses hashes already computed, where a simhash over word shingles
+would cost about half as much CPU again as Trinity per page.
+"""
+
+from hashlib import blake2b
+
+
+class BlockFilter:
+    """Set of text block hashes seen on one site, dropping repeated blocks from each new page.
+
+    Use:
+        blocks = BlockFilter()
+        strings, hrefs = extract(html, blocks=True)
+        text = blocks.filter(strings)
+        print(blocks.stats())
+
+    Args:
+        seen (iterable, optional): Block hashes to start with (e.g. from a checkpoint). Default is empty.
+
+    Attributes:
+        seen (set): Hashes of blocks seen so far.
+        pages (list): Block hash -> chars of each page seen (not checkpointed, only used to skip near-duplicates).
+        kept (int): Blocks passed on.
+        skipped (int): Blocks dropped as already seen.
+        chars_skipped (int): Characters not rescanned thanks to dropped blocks.
+
+    Methods:
+        fingerprint: Returns 64-bit hash of a block's text (staticmethod).
+        filter: Returns text of a page's unseen blocks.
+        page: Returns text of a page's unseen blocks & whether it's a near-duplicate.
+        stats: Returns filter metrics.
+    """
+
+    # share of text in common with an earlier page that makes a page a near-duplicate
+    NEAR = 0.9
+
+    def __init__(self, seen=()):
+        self.seen = set(seen)
+        self.pages = []
+        self.kept = 0
+        self.skipped = 0
+        self.chars_skipped = 0
+
+    def __len__(self):
+        return len(self.seen)
+
+    @staticmethod
+    def fingerprint(text):
+        """Returns 64-bit hash of text (stable across processes, unlike hash())."""
+        return int.from_bytes(blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+
+    def filter(self, blocks):
+        """Returns text of blocks not seen before on this site & records them as seen.
+
+        Args:
+            blocks (iterable): Blocks of a page, each a list of strings (as from extract(html, blocks=True)).
+
+        Returns:
+            str: Unseen blocks joined as ''.join(strings) would, with a newline where seen blocks were dropped.
+        """
+
+        return self.page(blocks)[0]
+
+    def page(self, blocks):
+        """Returns text of blocks not seen before on this site & whether the page is a near-duplicate of an earlier one.
+
+        Args:
+            blocks (iterable): Blocks of a page, each a list of strings (as from extract(html, blocks=True)).
+
+        Returns:
+            tuple: (text, duplicate). Text as returned by filter, duplicate is True if the page shares
+                at least NEAR of its text with an earlier page.
+        """
+
+        parts = []
+        gap = False
+        # block hash -> chars on this page
+        signature = {}
+        for block in blocks:
+            text = ''.join(block)
+            key = BlockFilter.fingerprint(text)
+            signature[key] = signature.get(key, 0) + len(text)
+            if key in self.seen:
+                self.skipped += 1
+                self.chars_skipped += len(text)
+                gap = True
+                continue
+            self.seen.add(key)
+            self.kept += 1
+            if gap and parts:
+                parts.append('\n')
+            gap = False
+            parts.append(text)
+        duplicate = any(self.__overlap(signature, page) >= BlockFilter.NEAR for page in self.pages)
+        self.pages.append(signature)
+        return ''.join(parts), duplicate
+
+    @staticmethod
+    def __overlap(a, b):
+        """Returns chars of blocks in both pages over chars of the longer page (1.0 for identical text, 0 if both have none)."""
+
+        if len(a) > len(b):
+            a, b = b, a
+        longest = max(sum(a.values()), sum(b.values()))
+        if longest == 0:
+            return 0.0
+        return sum(min(chars, b[key]) for key, chars in a.items() if key in b) / longest
+
+    def stats(self):
+        """Returns dict of filter metrics."""
+
+        return {'kept': self.kept, 'skipped': self.skipped, 'chars_skipped': self.chars_skipped, 'seen': len(self.seen)}
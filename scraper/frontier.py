@@ -0,0 +1,126 @@
+"""Per-site crawl frontier used by Neo to decide which pages to visit next."""
+
+import heapq
+
+
+class Frontier:
+    """Queue of links still to visit for one site, with a visited set, depth limit and page budget.
+    Links are popped shallowest first, then highest rank first, then in the order they were found.
+
+    Use:
+        frontier = Frontier(depth=2, budget=16, rank=LinkSelector().priority)
+        frontier.push([href1], 0)
+        while not frontier.done:
+            for href, level in frontier.pop(4):
+                ...
+                frontier.push(found_links, level + 1)
+
+    Args:
+        depth (int, optional): Number of link levels to visit (homepage is level 0). Default is 2.
+        budget (int, optional): Max number of pages to fetch. Default is 16.
+        rank (func, optional): Returns priority of a link (higher is popped first). Default is None (order found).
+
+    Attributes:
+        depth (int): Number of link levels to visit.
+        budget (int): Max number of pages to fetch.
+        rank (func): Returns priority of a link.
+        visited (set): Links already queued or fetched.
+        fetched (int): Number of links popped for fetching.
+        pending (dict): Links popped but not yet completed -> level.
+
+    Methods:
+        push: Queues unseen links at given level.
+        pop: Pops next links to fetch within page budget.
+        complete: Marks a popped link as done.
+        state: Returns JSON encodable state for checkpointing.
+        restore: Rebuilds a frontier from state (classmethod).
+    """
+
+    def __init__(self, depth=2, budget=16, rank=None):
+        self.depth = depth
+        self.budget = budget
+        self.rank = rank
+        self.visited = set()
+        self.fetched = 0
+        self.pending = {}
+        # heap of (level, -rank, seq, href)
+        self.__queue = []
+        self.__seq = 0
+
+    def __len__(self):
+        return len(self.__queue)
+
+    @property
+    def done(self):
+        """True if there is nothing left to fetch or the page budget is spent."""
+        return not self.__queue or self.fetched >= self.budget
+
+    def push(self, hrefs, level):
+        """Queues links that have not been seen yet, ignoring those beyond depth limit.
+
+        Args:
+            hrefs (iterable): Full links.
+            level (int): Link level of hrefs (homepage is 0).
+        """
+
+        if level >= self.depth:
+            return
+        for href in hrefs:
+            if href not in self.visited:
+                self.visited.add(href)
+                heapq.heappush(self.__queue, (level, -self.rank(href) if self.rank else 0, self.__seq, href))
+                self.__seq += 1
+
+    def pop(self, n=1):
+        """Pops up to n links to fetch, never exceeding the page budget.
+
+        Args:
+            n (int, optional): Max number of links. Default is 1.
+
+        Returns:
+            list: List of (href, level) tuples.
+        """
+
+        batch = []
+        while self.__queue and len(batch) < n and self.fetched < self.budget:
+            level, _, _, href = heapq.heappop(self.__queue)
+            batch.append((href, level))
+            self.pending[href] = level
+            self.fetched += 1
+        return batch
+
+    def complete(self, href):
+        """Marks a popped link as done (its links should have been pushed already)."""
+        self.pending.pop(href, None)
+
+    def state(self):
+        """Returns JSON encodable state. Links still pending are put back in the queue,
+        so a restored frontier fetches them again rather than losing them."""
+
+        queue = self.__queue + [(level, -self.rank(href) if self.rank else 0, -1, href) for href, level in self.pending.items()]
+        return {'depth': self.depth,
+            'budget': self.budget,
+            'fetched': self.fetched - len(self.pending),
+            'visited': sorted(self.visited),
+            'queue': [[level, href] for level, _, _, href in sorted(queue)]}
+
+    @classmethod
+    def restore(cls, state, rank=None):
+        """Rebuilds frontier from state returned by Frontier.state.
+
+        Args:
+            state (dict): Frontier state.
+            rank (func, optional): Returns priority of a link. Default is None.
+
+        Returns:
+            :obj: Frontier: Frontier ready to carry on popping.
+        """
+
+        frontier = cls(state['depth'], state['budget'], rank)
+        frontier.fetched = state['fetched']
+        frontier.visited = set(state['visited'])
+        # queue is saved in pop order, so seq keeps ties in the same order
+        for level, href in state['queue']:
+            heapq.heappush(frontier.__queue, (level, -rank(href) if rank else 0, frontier.__seq, href))
+            frontier.__seq += 1
+        return frontier
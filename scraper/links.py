@@ -0,0 +1,87 @@
+"""Link selection rules for Neo: which links of a page to follow, and which to follow first.
+
+find_hrefs used to run a chain of `in` checks ('terms', 'login', ...) on every anchor and hand back an
+unordered set, so which 15 pages of a site got crawled was down to set order. LinkSelector compiles
+exclude & include rules into one regex each, and ranks links by offer keywords in their path (e.g.
+'offers', 'deals', 'membership'), so the frontier spends the page budget on likely offer pages first.
+"""
+
+import re
+
+# links containing any of these are not worth a fetch (legal pages, logins, sitemaps & downloads)
+EXCLUDE = ['terms', 'conditions', 'download', 'policy', 'map', 'login', 'privacy']
+# keyword -> priority points of links containing it (points of different keywords add up)
+PRIORITY = {
+    'offer': 5, 'deal': 5, 'discount': 5, 'promo': 4, 'sale': 4, 'voucher': 4, 'coupon': 4,
+    'gift': 3, 'membership': 3, 'member': 2, 'subscri': 3, 'loyalty': 3, 'reward': 3, 'free': 3,
+    'pricing': 3, 'price': 2, 'special': 2, 'shop': 2, 'store': 2, 'menu': 1, 'product': 1,
+}
+
+
+class LinkSelector:
+    """Compiled include/exclude rules & keyword priorities for links (matched case-insensitively).
+
+    Use:
+        links = LinkSelector(exclude=EXCLUDE, priority=PRIORITY)
+        hrefs = [href for href in hrefs if links.allows(href)]
+        first = max(hrefs, key=links.priority)
+
+    Args:
+        exclude (seq, optional): Substrings of links not to follow. Default is EXCLUDE.
+        priority (dict, optional): Keyword -> points of links containing it. Default is PRIORITY.
+        include (seq, optional): Regex patterns of which links must match one. Default is None (all links).
+
+    Attributes:
+        exclude (list): Substrings of links not to follow.
+        priority_words (dict): Keyword -> points.
+        include (list): Regex patterns of which links must match one.
+
+    Methods:
+        path: Returns offset of a link's path (staticmethod).
+        allows: Returns True if a link should be followed.
+        priority: Returns priority points of a link.
+    """
+
+    def __init__(self, exclude=EXCLUDE, priority=PRIORITY, include=None):
+        self.exclude = list(exclude)
+        self.priority_words = {word.lower(): points for word, points in priority.items()}
+        self.include = list(include or [])
+        self.__exclude = self.__literals(self.exclude)
+        # longest keywords first so 'membership' isn't read as 'member'
+        self.__priority = self.__literals(self.priority_words)
+        self.__include = re.compile('|'.join(f'(?:{p})' for p in self.include), re.I) if self.include else None
+
+    @staticmethod
+    def __literals(words):
+        """Returns one case-insensitive regex matching any of the literal words, or None if there are none."""
+        if not words:
+            return None
+        return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)), re.I)
+
+    @staticmethod
+    def path(href):
+        """Returns offset at which a link's path starts (the host is the same for every link of a site,
+        so only path & query tell pages apart, and a host like 'mapleleaf.com' mustn't exclude its own links)."""
+
+        if '//' not in href:
+            return 0
+        start = href.find('/', href.find('//') + 2)
+        return len(href) if start < 0 else start
+
+    def allows(self, href):
+        """Returns True if link's path matches no exclude rule (and an include rule if there are any)."""
+
+        # rules see the path alone, so '^/shop/' matches relative & absolute links alike
+        # (search(href, pos) would still only match '^' at the start of href)
+        path = href[LinkSelector.path(href):]
+        if self.__exclude is not None and self.__exclude.search(path):
+            return False
+        return self.__include is None or self.__include.search(path) is not None
+
+    def priority(self, href):
+        """Returns sum of points of the distinct keywords in a link's path & query (0 if none)."""
+
+        if self.__priority is None:
+            return 0
+        found = {m.group(0).lower() for m in self.__priority.finditer(href[LinkSelector.path(href):])}
+        return sum(self.priority_words[word] for word in found)
@@ -0,0 +1,219 @@
+"""Per-phase latency histograms for the scraping hot path, exported as JSON lines.
+
+Neo only printed what it was doing, so how a page's time split between host cooldown, connecting,
+waiting for the first byte, downloading, parsing, Trinity & database writes was guesswork.
+Metrics keeps one fixed-bucket histogram per (phase, outcome) in the worker process (an observation
+is a bisect & two additions, no locks since green threads & coroutines don't preempt), and appends a
+snapshot of every histogram to a JSON lines file every `interval` secs. Counts are totals since the
+worker started, so the latest line of each (worker, phase, outcome) holds everything.
+
+Phases timed by Neo & Pipeline (see Neo.METRICS):
+    cooldown: Wait for the host's slot in HostScheduler.
+    dns, connect: Resolving the host & opening the connection, TLS handshake included (AsyncNeo only,
+        requests doesn't expose them, so for Neo they're part of ttfb).
+    ttfb: Request sent to response headers read.
+    download: Reading the body.
+    parse: Extracting text blocks & links (and dropping blocks seen before).
+    match: Trinity.
+    site: Whole crawl of a site.
+    flush: Database write of buffered rows.
+
+Summarise an export with:
+$ python latency.py databases/metrics.jsonl
+"""
+
+import bisect
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+
+class Histogram:
+    """Latency histogram with fixed bucket upper bounds (secs).
+
+    Args:
+        bounds (seq): Ascending bucket upper bounds. Observations above the last one go in an overflow bucket.
+
+    Attributes:
+        bounds (tuple): Bucket upper bounds.
+        counts (list): Observations per bucket (last is overflow).
+        count (int): Observations.
+        sum (float): Sum of observations.
+
+    Methods:
+        observe: Records an observation.
+        quantile: Returns estimated quantile.
+        state: Returns JSON encodable snapshot.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, secs):
+        """Records an observation in secs."""
+        self.counts[bisect.bisect_left(self.bounds, secs)] += 1
+        self.count += 1
+        self.sum += secs
+
+    def quantile(self, q):
+        """Returns upper bound of the bucket holding quantile q (inf if in overflow, None if empty)."""
+
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds + (float('inf'),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def state(self):
+        """Returns dict of count, sum, p50/p90/p99 & bucket counts keyed by upper bound ('inf' for overflow)."""
+
+        quantiles = {f'p{int(q * 100)}': self.quantile(q) for q in (0.5, 0.9, 0.99)}
+        # JSON has no infinity
+        quantiles = {k: 'inf' if v == float('inf') else v for k, v in quantiles.items()}
+        buckets = {str(bound): n for bound, n in zip(self.bounds, self.counts) if n}
+        if self.counts[-1]:
+            buckets['inf'] = self.counts[-1]
+        return {'count': self.count, 'sum': round(self.sum, 6), **quantiles, 'buckets': buckets}
+
+
+class Metrics:
+    """In-process collector of per-phase latency histograms labelled by worker, phase & outcome.
+
+    Use:
+        metrics = Metrics('databases/metrics.jsonl', interval=60)
+        with metrics.time('parse') as timer:
+            ...
+            timer.outcome = 'duplicate'
+        metrics.observe('ttfb', 0.21, '2xx')
+        metrics.export()
+
+    Args:
+        path (str, optional): JSON lines file snapshots are appended to. Default is None (collect only).
+        interval (float, optional): Secs between exports (checked on each observation). Default is 60.
+        worker (str, optional): Worker label. Default is 'host:pid'.
+        bounds (seq, optional): Histogram bucket upper bounds in secs. Default is BOUNDS.
+
+    Attributes:
+        path (str): JSON lines file snapshots are appended to (None to only collect).
+        interval (float): Secs between exports.
+        worker (str): Worker label.
+        histograms (dict): (phase, outcome) -> Histogram.
+
+    Methods:
+        observe: Records secs spent in a phase.
+        time: Context manager timing a phase.
+        outcome: Returns outcome label of an HTTP status (staticmethod).
+        snapshot: Returns JSON encodable rows of all histograms.
+        export: Appends snapshot to path.
+    """
+
+    # bucket upper bounds in secs, from a cached page's parse to a stalled download
+    BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, path=None, interval=60, worker=None, bounds=BOUNDS):
+        self.path = path
+        self.interval = interval
+        self.worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        self.bounds = tuple(bounds)
+        self.histograms = {}
+        self.__exported = time.monotonic()
+
+    def observe(self, phase, secs, outcome='ok'):
+        """Records secs spent in a phase, exporting if interval has passed.
+
+        Args:
+            phase (str): Phase name (e.g. 'ttfb').
+            secs (float): Duration.
+            outcome (str, optional): Outcome label (e.g. '2xx', 'error'). Default is 'ok'.
+        """
+
+        key = (phase, outcome)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.bounds)
+        histogram.observe(secs)
+        if self.path is not None and time.monotonic() - self.__exported >= self.interval:
+            self.export()
+
+    @contextmanager
+    def time(self, phase, outcome='ok'):
+        """Times the block as phase. Outcome can be changed through the yielded timer's outcome
+        attribute, and is 'error' if the block raises."""
+
+        timer = _Timer(outcome)
+        start = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            timer.outcome = 'error'
+            raise
+        finally:
+            self.observe(phase, time.perf_counter() - start, timer.outcome)
+
+    @staticmethod
+    def outcome(status_code):
+        """Returns outcome label of an HTTP status code ('2xx', '3xx', '429', '4xx', '5xx')."""
+        return '429' if status_code == 429 else f'{status_code // 100}xx'
+
+    def snapshot(self):
+        """Returns list of dicts (one per phase & outcome) with worker label & histogram state."""
+
+        now = round(time.time(), 3)
+        return [{'time': now, 'worker': self.worker, 'phase': phase, 'outcome': outcome, **histogram.state()}
+            for (phase, outcome), histogram in sorted(self.histograms.items())]
+
+    def export(self):
+        """Appends snapshot to path as JSON lines (no-op without path)."""
+
+        self.__exported = time.monotonic()
+        if self.path is None or not self.histograms:
+            return
+        lines = ''.join(json.dumps(row) + '\n' for row in self.snapshot())
+        # one write per export so lines of workers sharing the file don't interleave
+        with open(self.path, 'a') as f:
+            f.write(lines)
+
+
+class _Timer:
+    """Outcome holder yielded by Metrics.time."""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+
+def summary(path):
+    """Returns latest row of each (worker, phase, outcome) in an export, merged across workers
+    into one row per (phase, outcome) with count, mean & bucket counts."""
+
+    latest = {}
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            latest[(row['worker'], row['phase'], row['outcome'])] = row
+    merged = {}
+    for (_, phase, outcome), row in latest.items():
+        total = merged.setdefault((phase, outcome), {'phase': phase, 'outcome': outcome, 'workers': 0, 'count': 0, 'sum': 0.0, 'buckets': {}})
+        total['workers'] += 1
+        total['count'] += row['count']
+        total['sum'] += row['sum']
+        for bound, n in row['buckets'].items():
+            total['buckets'][bound] = total['buckets'].get(bound, 0) + n
+    for total in merged.values():
+        # empty buckets aren't exported, which doesn't change which bucket a quantile falls in
+        bounds = sorted((b for b in total['buckets'] if b != 'inf'), key=float)
+        histogram = Histogram(float(b) for b in bounds)
+        histogram.counts = [total['buckets'][b] for b in bounds] + [total['buckets'].get('inf', 0)]
+        histogram.count = total['count']
+        total['mean'] = total['sum'] / total['count'] if total['count'] else None
+        total.update({f'p{int(q * 100)}': histogram.quantile(q) for q in (0.5, 0.9, 0.99)})
+    return [merged[key] for key in sorted(merged)]
+
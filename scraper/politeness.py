@@ -0,0 +1,118 @@
+"""Per-host politeness scheduling shared by every scraper in a worker process.
+
+Rather than each scraper sleeping between its own pages, requests book the next free slot
+of their host. Scrapers of other hosts are never held up, and two scrapers that hit the same
+host (e.g. the many *.business.site or facebook.com rows in sites_list/main.csv) are spaced
+out between them. A priority queue of slot expiry times lets idle hosts be forgotten.
+"""
+
+import heapq
+import time
+from urllib.parse import urlsplit
+
+
+class HostScheduler:
+    """Books request slots per host so each host gets at most `lanes` requests per cooldown.
+
+    Use:
+        scheduler = HostScheduler(cooldown=5)
+        # blocking (green thread sleeps under Eventlet, leaving the hub free for other hosts)
+        scheduler.wait(href)
+        # asyncio
+        await asyncio.sleep(scheduler.reserve(href))
+
+    Args:
+        cooldown (float or callable): Minimum secs between requests in the same lane of a host
+            (a callable is read on every booking, e.g. lambda: Neo.COOLDOWN).
+        lanes (int or callable, optional): Requests a host may have started within one cooldown. Default is 1.
+
+    Attributes:
+        cooldown (float): Minimum secs between requests in the same lane of a host.
+        lanes (int): Requests a host may have started within one cooldown.
+
+    Methods:
+        reserve: Books next slot for a link's host and returns secs until it opens.
+        wait: Reserves and sleeps until slot opens.
+        backoff: Holds back all requests to a host for given secs.
+    """
+
+    def __init__(self, cooldown, lanes=1):
+        self.cooldown = cooldown
+        self.lanes = lanes
+        # host -> list of times at which each lane is free again
+        self.__slots = {}
+        # heap of (time, host) used to release hosts once their cooldowns expire
+        self.__expiry = []
+
+    def __len__(self):
+        return len(self.__slots)
+
+    @property
+    def cooldown(self):
+        return self.__cooldown() if callable(self.__cooldown) else self.__cooldown
+
+    @cooldown.setter
+    def cooldown(self, cooldown):
+        self.__cooldown = cooldown
+
+    @property
+    def lanes(self):
+        return self.__lanes() if callable(self.__lanes) else self.__lanes
+
+    @lanes.setter
+    def lanes(self, lanes):
+        self.__lanes = lanes
+
+    @staticmethod
+    def host(href):
+        """Returns lowercase host (with port) of link."""
+        return urlsplit(href).netloc.lower()
+
+    def __release(self, now):
+        """Pops expired entries off heap and forgets hosts that have every lane free."""
+        while self.__expiry and self.__expiry[0][0] <= now:
+            _, host = heapq.heappop(self.__expiry)
+            # host may have been booked again since this entry was pushed
+            lanes = self.__slots.get(host)
+            if lanes is not None and max(lanes) <= now:
+                del self.__slots[host]
+
+    def reserve(self, href):
+        """Books next free slot for the link's host.
+
+        Args:
+            href (str): Full link about to be requested.
+
+        Returns:
+            float: Secs to wait before making the request (0 if host is free).
+        """
+
+        now = time.monotonic()
+        cooldown = self.cooldown
+        self.__release(now)
+        host = self.host(href)
+        lanes = self.__slots.setdefault(host, [])
+        if len(lanes) < self.lanes:
+            slot = now
+            lanes.append(slot + cooldown)
+        else:
+            # take the lane that frees up first
+            i = lanes.index(min(lanes))
+            slot = max(now, lanes[i])
+            lanes[i] = slot + cooldown
+        heapq.heappush(self.__expiry, (slot + cooldown, host))
+        return slot - now
+
+    def wait(self, href):
+        """Reserves a slot for the link's host and sleeps until it opens."""
+        delay = self.reserve(href)
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff(self, href, secs):
+        """Holds back all requests to the link's host for at least given secs (e.g. after 429)."""
+        until = time.monotonic() + secs
+        host = self.host(href)
+        lanes = self.__slots.get(host, [])
+        self.__slots[host] = [max(until, t) for t in lanes] + [until] * (self.lanes - len(lanes))
+        heapq.heappush(self.__expiry, (max(self.__slots[host]), host))
@@ -0,0 +1,135 @@
+"""Keep-alive HTTP sessions shared by every scraper in a worker process.
+
+requests.get opens a new connection (and TLS handshake) for every page. Here each host gets its own
+requests.Session with a bounded urllib3 connection pool, so a site's pages reuse connections
+across all the green threads in the worker. Sessions are dropped once idle or when the pool is full.
+
+gzip/deflate (and brotli when the brotli package is installed) are negotiated by requests' default headers.
+"""
+
+import time
+from urllib.parse import urlsplit
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """LRU pool of per-host keep-alive sessions with hit/miss metrics.
+
+    Use:
+        pool = SessionPool(size=20000, idle=60)
+        response = pool.get(href).get(href, timeout=5)
+        print(pool.stats())
+
+    Args:
+        size (int, optional): Max number of hosts with a live session. Default is 20000
+            (above a worker's site concurrency, or sessions are evicted before a site's next page).
+        idle (float, optional): Secs after which an unused session is closed. Default is 60.
+        connections (int, optional): Max keep-alive connections per host. Default is 4.
+
+    Attributes:
+        size (int): Max number of hosts with a live session.
+        idle (float): Secs after which an unused session is closed.
+        connections (int): Max keep-alive connections per host.
+        hits (int): Session lookups served by an existing session.
+        misses (int): Session lookups that had to open a new session.
+        evictions (int): Sessions closed for being idle or least recently used.
+
+    Methods:
+        get: Returns the session for a link's host.
+        stats: Returns pool & connection reuse metrics.
+        close: Closes all sessions.
+    """
+
+    def __init__(self, size=20000, idle=60, connections=4):
+        self.size = size
+        self.idle = idle
+        self.connections = connections
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # host -> (session, last used), least recently used first
+        self.__sessions = OrderedDict()
+        # connection counters carried over from closed sessions
+        self.__opened = 0
+        self.__requests = 0
+
+    def __len__(self):
+        return len(self.__sessions)
+
+    def __new(self):
+        session = requests.Session()
+        # no retries so timeouts surface to Neo as before
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.connections, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @staticmethod
+    def __pools(session):
+        """Yields urllib3 connection pools of a session."""
+        # the same adapter is mounted for http & https
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                yield pools[key]
+
+    def __evict(self, host):
+        session, _ = self.__sessions.pop(host)
+        for pool in self.__pools(session):
+            self.__opened += pool.num_connections
+            self.__requests += pool.num_requests
+        session.close()
+        self.evictions += 1
+
+    def get(self, href):
+        """Returns keep-alive session for the link's host, opening one if needed.
+
+        Args:
+            href (str): Full link about to be requested.
+
+        Returns:
+            :obj: requests.Session: Session for the host.
+        """
+
+        now = time.monotonic()
+        # close sessions that have been idle too long (oldest first)
+        while self.__sessions:
+            host, (_, used) = next(iter(self.__sessions.items()))
+            if now - used < self.idle:
+                break
+            self.__evict(host)
+        host = urlsplit(href).netloc.lower()
+        if host in self.__sessions:
+            self.hits += 1
+            session = self.__sessions[host][0]
+            self.__sessions.move_to_end(host)
+        else:
+            self.misses += 1
+            session = self.__new()
+            if len(self.__sessions) >= self.size:
+                self.__evict(next(iter(self.__sessions)))
+        self.__sessions[host] = (session, now)
+        return session
+
+    def stats(self):
+        """Returns dict of pool metrics. Reused connections are requests that did not need a new connection."""
+
+        opened = self.__opened
+        sent = self.__requests
+        for session, _ in self.__sessions.values():
+            for pool in self.__pools(session):
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'sessions': len(self.__sessions),
+            'connections_opened': opened,
+            'connections_reused': max(sent - opened, 0)}
+
+    def close(self):
+        """Closes all sessions."""
+        for host in list(self.__sessions):
+            self.__evict(host)
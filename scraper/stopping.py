@@ -0,0 +1,122 @@
+"""Early stopping of site crawls once pages stop yielding anything new.
+
+Neo used to spend the whole page budget on every site (each page behind a host cooldown), even when
+the homepage & first pages all scored zero, or when new pages only repeated findings already made.
+StopPolicy ends a crawl after `zeros` pages in a row scored zero, or after `stale` pages in a row
+added no new unique discount, freebie or subscription, and counts how many fetches that saved.
+"""
+
+
+class StopPolicy:
+    """Thresholds for ending site crawls early, with totals across all sites tracked with it.
+    Shared by all scrapers in a worker process (see Neo.STOP).
+
+    Use:
+        policy = StopPolicy(zeros=5, stale=8)
+        site = policy.track()
+        site.page(score, findings)
+        if site.done:
+            site.stop(remaining=4)
+        print(policy.stats())
+
+    Args:
+        zeros (int, optional): Consecutive zero-score pages that end a crawl. Default is 5 (None to never stop on this).
+        stale (int, optional): Consecutive pages without new unique findings that end a crawl. Default is 8 (None to never).
+
+    Attributes:
+        zeros (int): Consecutive zero-score pages that end a crawl.
+        stale (int): Consecutive pages without new findings that end a crawl.
+        sites (int): Sites with at least one page recorded.
+        stopped (dict): Reason -> number of sites stopped early.
+        saved (int): Fetches left in the budget of sites stopped early.
+
+    Methods:
+        track: Returns tracker for a new site crawl.
+        stats: Returns early stopping metrics.
+    """
+
+    def __init__(self, zeros=5, stale=8):
+        self.zeros = zeros
+        self.stale = stale
+        self.sites = 0
+        self.stopped = {'zeros': 0, 'stale': 0}
+        self.saved = 0
+
+    def track(self, state=None):
+        """Returns SiteYield tracker for a site (optionally restored from SiteYield.state)."""
+        return SiteYield(self, state)
+
+    def stats(self):
+        """Returns dict of early stopping metrics."""
+
+        return {'sites': self.sites,
+            'stopped': sum(self.stopped.values()),
+            'stopped_zeros': self.stopped['zeros'],
+            'stopped_stale': self.stopped['stale'],
+            'fetches_saved': self.saved}
+
+
+class SiteYield:
+    """Yield of one site's crawl so far, checked against its StopPolicy.
+
+    Args:
+        policy (:obj: StopPolicy): Thresholds & totals.
+        state (dict, optional): State from SiteYield.state. Default is None.
+
+    Attributes:
+        pages (int): Pages recorded.
+        zeros (int): Consecutive zero-score pages up to now.
+        stale (int): Consecutive pages without new findings up to now.
+        found (set): Unique findings so far (as strings).
+        reason (str): Why crawl should stop ('zeros' or 'stale'), else None.
+
+    Methods:
+        page: Records a page's score & findings.
+        stop: Records crawl as stopped early.
+        state: Returns JSON encodable state.
+    """
+
+    def __init__(self, policy, state=None):
+        self.policy = policy
+        state = state or {}
+        self.pages = state.get('pages', 0)
+        self.zeros = state.get('zeros', 0)
+        self.stale = state.get('stale', 0)
+        self.found = set(state.get('found', ()))
+        self.reason = None
+
+    @property
+    def done(self):
+        """True if the site's pages have stopped yielding (crawl should end)."""
+        return self.reason is not None
+
+    def page(self, score, findings=()):
+        """Records a fetched page.
+
+        Args:
+            score (int): Trinity score of page.
+            findings (iterable, optional): Discounts, freebies & subscriptions found on page. Default is none.
+        """
+
+        self.pages += 1
+        if self.pages == 1:
+            self.policy.sites += 1
+        self.zeros = 0 if score > 0 else self.zeros + 1
+        new = {str(f) for f in findings} - self.found
+        self.found.update(new)
+        self.stale = 0 if new else self.stale + 1
+        if self.policy.zeros is not None and self.zeros >= self.policy.zeros:
+            self.reason = 'zeros'
+        elif self.policy.stale is not None and self.stale >= self.policy.stale:
+            self.reason = 'stale'
+
+    def stop(self, remaining):
+        """Records crawl as stopped early with `remaining` fetches left unspent."""
+
+        self.policy.stopped[self.reason] += 1
+        self.policy.saved += remaining
+
+    def state(self):
+        """Returns JSON encodable state for checkpointing."""
+
+        return {'pages': self.pages, 'zeros': self.zeros, 'stale': self.stale, 'found': sorted(self.found)}
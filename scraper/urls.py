@@ -0,0 +1,64 @@
+"""Canonical form of links, so one page reached by several spellings is only queued once.
+
+'/menu', '/menu/', '/menu?utm_source=x', 'https://site.com/menu' and '/menu#top' used to be five pages
+to Neo, each spending part of the page budget, a fetch and a host cooldown. canonicalize resolves a
+link against the page it was found on (urljoin, rather than string concatenation) and then drops
+what doesn't change the page served: fragments, tracking parameters, default ports, a trailing slash
+and the order of query parameters.
+"""
+
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+# query parameters added by ad & mail platforms to track clicks
+TRACKING = {'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid', 'ttclid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'hsctatracking', 'mkt_tok', 'ref_src', 'spm'}
+# query parameters with these prefixes are dropped too (utm_source, utm_medium, ...)
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def tracking(name):
+    """Returns True if a query parameter name only tracks clicks."""
+    name = name.lower()
+    return name in TRACKING or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize(href, base=None):
+    """Returns canonical absolute form of a link.
+
+    Use:
+        canonicalize('/menu/?utm_source=x#top', 'https://Site.com:443/shop/') == 'https://site.com/menu'
+
+    Args:
+        href (str): Link as found in page (relative or absolute).
+        base (str, optional): Link of page it was found on. Default is None (href is absolute).
+
+    Returns:
+        str: Absolute link with lowercase scheme & host, no default port, fragment, tracking parameters
+            or trailing slash (except for the root path), and query parameters sorted.
+    """
+
+    href = href.strip()
+    if base is not None:
+        href = urljoin(base, href)
+    parts = urlsplit(href)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    # IPv6 literal
+    if ':' in host:
+        host = f'[{host}]'
+    try:
+        port = parts.port
+    # malformed port, keep netloc as found
+    except ValueError:
+        port = None
+        host = parts.netloc.lower()
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{port}'
+    if parts.username or parts.password:
+        host = parts.netloc.rsplit('@', 1)[0] + '@' + host
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not tracking(k)))
+    return urlunsplit((scheme, host, path, query, ''))
@@ -0,0 +1,6 @@
+"""
+This directory is for automated unit testing of scraper package using pytest.
+
+Run with:
+$ pytest scraper_tests -rP
+"""
@@ -0,0 +1,44 @@
+import pytest
+import random
+from scraper.cache import PageCache
+
+class Tests:
+    def test_roundtrip(self, tmp_path):
+        cache = PageCache(str(tmp_path))
+        cache.put('https://site.com/a#top', b'<p>20% off</p>', 'utf-8', etag='"v1"')
+        page = cache.get('https://site.com/a')
+        assert page['body'] == b'<p>20% off</p>'
+        assert PageCache.headers(page) == {'If-None-Match': '"v1"'}
+        assert cache.get('https://site.com/b') is None
+        assert PageCache.headers(None) == {}
+
+    def test_identical_bodies_stored_once(self, tmp_path):
+        cache = PageCache(str(tmp_path))
+        cache.put('https://site.com/a', b'same page')
+        cache.put('https://site.com/b', b'same page')
+        assert len(cache) == 2
+        assert len(list(tmp_path.glob('*/*.z'))) == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = PageCache(str(tmp_path), max_bytes=2000)
+        # random bytes don't compress, so each body takes ~800 bytes
+        pages = [random.Random(i).randbytes(800) for i in range(4)]
+        for i, body in enumerate(pages):
+            cache.put(f'https://site.com/{i}', body)
+            # keep first page in use
+            cache.get('https://site.com/0')
+        assert cache.stats()['bytes'] <= 2000
+        assert cache.get('https://site.com/0')['body'] == pages[0]
+        assert cache.get('https://site.com/3')['body'] == pages[3]
+        assert cache.get('https://site.com/1') is None
+
+    def test_changed_page_replaces_old_body(self, tmp_path):
+        cache = PageCache(str(tmp_path), max_bytes=5000)
+        cache.put('https://site.com/shared', random.Random(0).randbytes(800))
+        for i in range(20):
+            cache.put('https://site.com/', random.Random(i).randbytes(800))
+        # version 0 is still used by another page, every other old version is gone
+        assert cache.get('https://site.com/')['body'] == random.Random(19).randbytes(800)
+        assert cache.get('https://site.com/shared')['body'] == random.Random(0).randbytes(800)
+        assert len(list(tmp_path.glob('*/*.z'))) == 2
+        assert cache.stats()['pages'] == 2 and cache.stats()['bytes'] < 2000
@@ -0,0 +1,54 @@
+import pytest
+import sqlite3
+import time
+from scraper import Neo
+from scraper.frontier import Frontier
+from scraper.checkpoint import Checkpoints
+
+class Tests:
+    def test_frontier_restore(self):
+        frontier = Frontier(depth=3, budget=5)
+        frontier.push(['/'], 0)
+        frontier.pop()
+        frontier.complete('/')
+        frontier.push(['/a', '/b', '/c'], 1)
+        # '/a' is popped but never completed, so it is queued again on restore
+        frontier.pop(2)
+        frontier.complete('/b')
+        restored = Frontier.restore(frontier.state())
+        assert restored.fetched == 2
+        assert restored.visited == {'/', '/a', '/b', '/c'}
+        assert restored.pop(5) == [('/a', 1), ('/c', 1)]
+        assert restored.done
+
+    def test_neo_state_roundtrip(self, tmp_path):
+        scraper = Neo('https://site.com')
+        scraper.results = {'links': ['https://site.com/a'],
+            'scores': [12],
+            'discounts': [{'20% off'}],
+            'freebies': [''],
+            'subscriptions': [{('monthly', 'box')}]}
+        checkpoints = Checkpoints(str(tmp_path / 'checkpoints.db'))
+        checkpoints.save(1, scraper.state())
+        restored = Neo('https://site.com')
+        restored.restore(checkpoints.load(1))
+        assert restored.results == scraper.results
+        checkpoints.drop(1)
+        assert checkpoints.load(1) is None
+
+    def test_locked_file_skips_write(self, tmp_path):
+        path = str(tmp_path / 'checkpoints.db')
+        checkpoints = Checkpoints(path)
+        checkpoints.save(1, {'a': 1})
+        # another worker mid-write
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        start = time.monotonic()
+        checkpoints.save(1, {'a': 2})
+        assert time.monotonic() - start < 1
+        assert checkpoints.skipped == 1
+        # readers aren't held up by the writer
+        assert checkpoints.load(1) == {'a': 1}
+        other.execute('ROLLBACK')
+        checkpoints.save(1, {'a': 2})
+        assert checkpoints.load(1) == {'a': 2}
@@ -0,0 +1,39 @@
+import pytest
+from bs4 import BeautifulSoup
+from scraper.extract import extract
+
+PAGES = [
+    '',
+    'plain text, no tags',
+    '<!DOCTYPE html><html><head><title> Cafe &amp; Bar </title><style>p{color:red}</style>'
+    '<script>var offer = "50% off";</script></head><body><!-- banner --><p>Get <b>20%</b>&nbsp;off</p>'
+    '<a href="/menu">Menu</a><a href>empty</a><a>none</a><a href="/a" href="/b">dup</a></body></html>',
+    '<template><p>hidden £5 off</p></template><noscript>enable js</noscript><textarea> free </textarea>',
+    '<svg><style>.s{}</style><text>logo</text></svg><![CDATA[raw]]><?xml version="1.0"?>',
+    '<div>unclosed <p>tags <span>everywhere<div>&pound;10 &#37; &#x25; &copy &unknown; a&b</div>',
+    '<A HREF="/Upper">Case</A><a href="https://site.com/x?a=1&amp;b=2#top">amp</a>',
+    '<ul>\n  <li>\n\tone\n  </li>\n  <li>two</li>\n</ul>\n<script type="application/ld+json">{"a": 1}</script>tail',
+    '&#150; &#x96; &#0; &#65abc &#xZZ; &#; &amp &ampx &notit; &#128512; <p title="&amp;">&lt;&gt;</p>',
+    '<p>broken <a href="/x">link <p>nested</a> after</p><script>if (a < b) { x = "</div>"; }</script>end',
+]
+
+class Tests:
+    def test_parity_with_beautifulsoup(self):
+        for html in PAGES:
+            soup = BeautifulSoup(html, 'html.parser')
+            strings, hrefs = extract(html)
+            assert ''.join(strings) == soup.get_text(strip=True)
+            assert hrefs == [tag.get('href') for tag in soup.find_all('a', href=True)]
+
+    def test_strings(self):
+        strings, hrefs = extract('<p> Get <b>20%</b> off </p><script>x</script><a href="/deals">Deals</a>')
+        assert strings == ['Get', '20%', 'off', 'Deals']
+        assert hrefs == ['/deals']
+
+    def test_blocks(self):
+        for html in PAGES:
+            strings, hrefs = extract(html)
+            blocks, _ = extract(html, blocks=True)
+            assert [string for block in blocks for string in block] == strings
+        blocks, _ = extract('<nav><li>Home</li><li>Shop</li></nav><p>Get <b>20%</b> off</p>tail', blocks=True)
+        assert blocks == [['Home'], ['Shop'], ['Get', '20%', 'off'], ['tail']]
@@ -0,0 +1,35 @@
+import pytest
+from scraper import Neo
+from scraper.fingerprint import BlockFilter
+
+BANNER = '<header><p>Subscribe for free delivery</p></header><nav><li>Home</li><li>Offers</li></nav>'
+
+class Tests:
+    def test_filter(self):
+        blocks = BlockFilter()
+        assert blocks.filter([['Home'], ['Get', '20%', 'off']]) == 'HomeGet20%off'
+        # seen blocks are dropped & text either side of them can't join into one match
+        assert blocks.filter([['10'], ['Home'], ['% off']]) == '10\n% off'
+        assert blocks.stats() == {'kept': 4, 'skipped': 1, 'chars_skipped': 4, 'seen': 4}
+
+    def test_site_banner_scored_once(self):
+        scraper = Neo('https://site.com')
+        scraper.digest('https://site.com/', f'<html><body>{BANNER}<p>20% off</p></body></html>')
+        scraper.digest('https://site.com/a', f'<html><body>{BANNER}<p>£5 off</p></body></html>')
+        scraper.digest('https://site.com/b', f'<html><body>{BANNER}<p>About us</p></body></html>')
+        assert scraper.results['links'] == ['https://site.com/', 'https://site.com/a']
+        assert scraper.results['scores'] == [10 + 2 + 1, 10]
+        # checkpoints carry seen blocks
+        restored = Neo('https://site.com')
+        restored.restore(scraper.state())
+        assert restored.blocks.seen == scraper.blocks.seen
+
+    def test_near_duplicate_pages(self):
+        blocks = BlockFilter()
+        listing = [['Product %d' % i, '£%d' % i] for i in range(20)]
+        assert blocks.page([['Shoes']] + listing) == ('Shoes' + ''.join(''.join(b) for b in listing), False)
+        # same listing sorted differently, under a new heading
+        assert blocks.page([['Shoes sorted by price']] + listing[::-1])[1]
+        assert not blocks.page([['About us'], ['Founded 1990']])[1]
+        # pages without text are never duplicates
+        assert not blocks.page([])[1] and not blocks.page([])[1]
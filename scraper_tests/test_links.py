@@ -0,0 +1,37 @@
+import pytest
+from scraper.links import LinkSelector
+from scraper.frontier import Frontier
+
+HREFS = ['/about', '/offers', '/terms-and-conditions', '/sitemap.xml', '/Login', '/shop/gift-cards',
+    '/blog/post-1', '/membership', 'https://mapleleaf.com/deals', 'https://mapleleaf.com/privacy-policy']
+
+class Tests:
+    def test_allows(self):
+        links = LinkSelector()
+        assert [href for href in HREFS if links.allows(href)] == ['/about', '/offers', '/shop/gift-cards',
+            '/blog/post-1', '/membership', 'https://mapleleaf.com/deals']
+        assert LinkSelector(include=[r"^/shop/"]).allows('/shop/x')
+        assert not LinkSelector(include=[r"^/shop/"]).allows('/about')
+        # include rules see the path of absolute links too
+        assert LinkSelector(include=[r"^/shop/"]).allows('https://site.com/shop/x')
+        assert not LinkSelector(include=[r"^/shop/"]).allows('https://site.com/about/shop/')
+
+    def test_priority(self):
+        links = LinkSelector()
+        assert links.priority('/about') == 0
+        assert links.priority('/OFFERS') == 5
+        # distinct keywords add up, host doesn't count
+        assert links.priority('https://freeshop.com/shop/gift-cards') == 2 + 3
+        assert links.priority('/membership') == 3
+
+    def test_frontier_pops_by_rank(self):
+        frontier = Frontier(depth=2, budget=4, rank=LinkSelector().priority)
+        frontier.push(['/'], 0)
+        frontier.pop()
+        frontier.complete('/')
+        frontier.push(['/about', '/blog', '/membership', '/offers', '/contact'], 1)
+        state = frontier.state()
+        assert [href for href, _ in frontier.pop(3)] == ['/offers', '/membership', '/about']
+        # restored frontier keeps the same order
+        restored = Frontier.restore(state, rank=LinkSelector().priority)
+        assert [href for href, _ in restored.pop(3)] == ['/offers', '/membership', '/about']
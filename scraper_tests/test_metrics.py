@@ -0,0 +1,46 @@
+import json
+import pytest
+from scraper import Neo
+from scraper.metrics import Histogram, Metrics, summary
+
+class Tests:
+    def test_histogram(self):
+        histogram = Histogram([0.01, 0.1, 1])
+        for secs in [0.005] * 90 + [0.05] * 9 + [5]:
+            histogram.observe(secs)
+        assert histogram.counts == [90, 9, 0, 1]
+        assert (histogram.quantile(0.5), histogram.quantile(0.99), histogram.quantile(1)) == (0.01, 0.1, float('inf'))
+        assert histogram.state()['buckets'] == {'0.01': 90, '0.1': 9, 'inf': 1}
+
+    def test_outcomes(self):
+        metrics = Metrics(worker='w1')
+        with metrics.time('ttfb') as timer:
+            timer.outcome = Metrics.outcome(429)
+        with pytest.raises(ValueError):
+            with metrics.time('parse'):
+                raise ValueError
+        metrics.observe('ttfb', 0.2, Metrics.outcome(200))
+        assert sorted(metrics.histograms) == [('parse', 'error'), ('ttfb', '2xx'), ('ttfb', '429')]
+
+    def test_export(self, tmp_path):
+        path = str(tmp_path / 'metrics.jsonl')
+        for worker in ('w1', 'w2'):
+            metrics = Metrics(path, worker=worker)
+            metrics.observe('match', 0.002, 'hit')
+            metrics.export()
+            metrics.observe('match', 0.02, 'hit')
+            metrics.export()
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        assert [(row['worker'], row['count']) for row in rows] == [('w1', 1), ('w1', 2), ('w2', 1), ('w2', 2)]
+        # latest totals of each worker are merged
+        assert summary(path) == [{'phase': 'match', 'outcome': 'hit', 'workers': 2, 'count': 4, 'sum': pytest.approx(0.044),
+            'buckets': {'0.0025': 2, '0.025': 2}, 'mean': pytest.approx(0.011), 'p50': 0.0025, 'p90': 0.025, 'p99': 0.025}]
+
+    def test_neo_phases(self, monkeypatch):
+        monkeypatch.setattr(Neo, 'METRICS', Metrics())
+        scraper = Neo('https://site.com')
+        scraper.digest('https://site.com/', '<html><body><p>20% off</p></body></html>')
+        scraper.digest('https://site.com/a', '<html><body><p>20% off</p></body></html>')
+        assert {key: h.count for key, h in Neo.METRICS.histograms.items()} == {
+            ('parse', 'ok'): 1, ('parse', 'duplicate'): 1, ('match', 'hit'): 1, ('match', 'zero'): 1}
@@ -0,0 +1,144 @@
+import pytest
+import pandas as pd
+from sqlalchemy import exc
+from scraper import Neo, Pipeline, RetryLater
+from scraper.bitmap import Bitmap
+from scraper.cache import PageCache
+
+@pytest.fixture
+def pipe(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('CHECKPOINTS', str(tmp_path / 'checkpoints.db'))
+    return Pipeline()
+
+def results(site, scores):
+    # results of a Neo crawl with one page per score
+    return {'links': [f'https://{site}/{i}' for i in range(len(scores))],
+        'scores': list(scores),
+        'discounts': [{'20% off'}] * len(scores),
+        'freebies': [''] * len(scores),
+        'subscriptions': [''] * len(scores)}
+
+def rows(pipe, table='main'):
+    return list(pipe.engine.execute(f"SELECT * FROM {table} ORDER BY {'id, link' if table == 'main' else 'id'}"))
+
+class Tests:
+    def test_homepage_retried_later_not_done(self, pipe, monkeypatch):
+        def fetch(self, href):
+            raise RetryLater(f"429 response: {href}")
+        monkeypatch.setattr(Neo, 'fetch', fetch)
+        with pytest.raises(RetryLater):
+            pipe.etl('https://site.com', id=1, name='site')
+        pipe.flush()
+        assert not pipe._saved(1)
+        assert rows(pipe, 'done') == []
+
+    def test_homepage_not_html_done(self, pipe, monkeypatch):
+        # e.g. a site whose homepage is a pdf won't have anything to parse next run either
+        monkeypatch.setattr(Neo, 'fetch', lambda self, href: None)
+        pipe.etl('https://site.com', id=1, name='site')
+        pipe.flush()
+        assert pipe._saved(1)
+        assert rows(pipe) == [] and rows(pipe, 'done') == [(1,)]
+
+    def test_replay_rescores_saved_sites(self, pipe, tmp_path, monkeypatch):
+        cache = PageCache(str(tmp_path / 'cache'))
+        cache.put('https://site.com/', b'<p>20% off</p>', 'utf-8')
+        monkeypatch.setattr(Neo, 'CACHE', cache)
+        # saved before a pattern change, including a page that no longer scores
+        pipe.engine.execute(pipe.main.insert(), [
+            {'id': 1, 'name': 'site', 'link': 'https://site.com/', 'score': 1},
+            {'id': 1, 'name': 'site', 'link': 'https://site.com/old', 'score': 1}])
+        pipe.engine.execute(pipe.done.insert(), [{'id': 1}])
+        pipe.completed.add(1)
+        cache.replay = True
+        pipe.etl('https://site.com/', id=1, name='site')
+        pipe.flush()
+        assert list(pipe.engine.execute('SELECT link, score FROM main')) == [('https://site.com/', 10)]
+
+    def test_flush_batches(self, pipe, monkeypatch):
+        monkeypatch.setattr(Pipeline, 'FLUSH_ROWS', 3)
+        monkeypatch.setattr(Pipeline, 'FLUSH_SECS', 3600)
+        pipe._save(results('a.com', [10, 12]), 1, 'a')
+        assert rows(pipe) == []
+        # third buffered row triggers a write of everything buffered
+        pipe._save(results('b.com', [1]), 2, 'b')
+        assert len(rows(pipe)) == 3 and rows(pipe, 'done') == [(1,), (2,)]
+        # pages with the same score keep only the first
+        pipe._save(results('c.com', [5, 5]), 3, 'c')
+        pipe.flush()
+        assert [row[2] for row in rows(pipe) if row[0] == 3] == ['https://c.com/0']
+
+    def test_flush_skips_saved_links(self, pipe):
+        pipe._save(results('a.com', [10]), 1, 'a')
+        pipe.flush()
+        # same page saved again (e.g. under another id) keeps the first row
+        pipe._save(results('a.com', [12]), 2, 'a again')
+        pipe.flush()
+        assert rows(pipe) == [(1, 'a', 'https://a.com/0', 10, "{'20% off'}", '', '')]
+        assert rows(pipe, 'done') == [(1,), (2,)]
+
+    def test_flush_error_keeps_buffer(self, pipe):
+        pipe._save(results('a.com', [10, 12]), 1, 'a')
+        pipe.engine.execute('DROP TABLE main')
+        with pytest.raises(exc.SQLAlchemyError):
+            pipe.flush()
+        assert rows(pipe, 'done') == []
+        pipe.main.create(pipe.engine)
+        pipe.flush()
+        assert len(rows(pipe)) == 2 and rows(pipe, 'done') == [(1,)]
+
+    def test_done_sites_skipped_after_restart(self, pipe, monkeypatch):
+        # site with rows, site without any, and a site saved before the done table existed
+        pipe._save(results('a.com', [10]), 1, 'a')
+        pipe._save(results('b.com', []), 2, 'b')
+        pipe.flush()
+        pipe.engine.execute(pipe.main.insert(), [{'id': 3, 'name': 'c', 'link': 'https://c.com/', 'score': 1}])
+        restarted = Pipeline()
+        assert [id in restarted.completed for id in (1, 2, 3, 4)] == [True, True, True, False]
+        assert len(restarted.completed) == 3
+        monkeypatch.setattr(Neo, 'execute', lambda self: pytest.fail('saved site crawled again'))
+        restarted.etl('https://b.com/', id=2, name='b')
+
+    def test_bitmap(self):
+        done = Bitmap([3, 0])
+        done.add(1000)
+        done.add(3)
+        assert len(done) == 3
+        assert [id in done for id in (0, 1, 3, 1000, 1001, 10**6, -1)] == [True, False, True, True, False, False, False]
+        with pytest.raises(ValueError):
+            done.add(-1)
+
+    def test_yeet(self, pipe, tmp_path):
+        for id in range(5):
+            pipe._save(results(f'site{id}.com', [10, 12]), id, f'site{id}')
+        out = tmp_path / 'out'
+        out.mkdir()
+        for name in ('final.csv', 'final.csv.gz'):
+            pipe.yeet(str(out / name), chunksize=3)
+        expected = pd.read_sql('SELECT * FROM main', pipe.engine)
+        assert len(expected) == 10
+        pd.testing.assert_frame_equal(pd.read_csv(out / 'final.csv', keep_default_na=False), expected, check_dtype=False)
+        pd.testing.assert_frame_equal(pd.read_csv(out / 'final.csv.gz', keep_default_na=False), expected, check_dtype=False)
+        # best page of each site, 4 rows per file
+        pipe.yeet(str(out / 'top.csv.gz'), query=Pipeline.TOP_PAGES, partition=4)
+        parts = sorted(p.name for p in out.glob('top-*.csv.gz'))
+        assert parts == ['top-0000.csv.gz', 'top-0001.csv.gz']
+        top = pd.concat(pd.read_csv(out / p) for p in parts)
+        assert list(top['score']) == [12] * 5
+
+    def test_yeet_parquet(self, pipe, tmp_path):
+        # parquet output is optional (pyarrow isn't in requirements.txt)
+        pytest.importorskip('pyarrow')
+        for id in range(5):
+            pipe._save(results(f'site{id}.com', [10, 12]), id, f'site{id}')
+        pipe.yeet(str(tmp_path / 'final.parquet'), chunksize=3)
+        expected = pd.read_sql('SELECT * FROM main', pipe.engine)
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'final.parquet'), expected, check_dtype=False)
+        pipe.yeet(str(tmp_path / 'top.parquet'), query=Pipeline.TOP_PAGES, partition=4)
+        assert [len(pd.read_parquet(tmp_path / f'top-000{n}.parquet')) for n in (0, 1)] == [4, 1]
+
+    def test_negative_id_rejected_before_crawl(self, pipe, monkeypatch):
+        monkeypatch.setattr(Neo, 'execute', lambda self: pytest.fail('site crawled'))
+        with pytest.raises(ValueError, match='non-negative'):
+            pipe.etl('https://site.com/', id=-1, name='site')
@@ -0,0 +1,41 @@
+import pytest
+import time
+from scraper import Neo
+from scraper.politeness import HostScheduler
+
+class Tests:
+    def test_lanes(self):
+        scheduler = HostScheduler(10, lanes=2)
+        assert scheduler.reserve('https://a.com/1') == 0
+        assert scheduler.reserve('https://A.com/2') == 0
+        # both lanes taken until their cooldowns end
+        assert scheduler.reserve('https://a.com/3') == pytest.approx(10, abs=0.1)
+        assert scheduler.reserve('https://a.com/4') == pytest.approx(10, abs=0.1)
+        assert scheduler.reserve('https://a.com/5') == pytest.approx(20, abs=0.1)
+        # other hosts aren't held up
+        assert scheduler.reserve('https://b.com/') == 0
+
+    def test_backoff(self):
+        scheduler = HostScheduler(1, lanes=2)
+        scheduler.reserve('https://a.com/')
+        scheduler.backoff('https://a.com/', 30)
+        assert scheduler.reserve('https://a.com/x') == pytest.approx(30, abs=0.1)
+        assert scheduler.reserve('https://a.com/y') == pytest.approx(30, abs=0.1)
+        assert scheduler.reserve('https://b.com/') == 0
+
+    def test_releases_idle_hosts(self):
+        scheduler = HostScheduler(0.01, lanes=2)
+        scheduler.reserve('https://a.com/')
+        scheduler.reserve('https://b.com/')
+        assert len(scheduler) == 2
+        time.sleep(0.02)
+        scheduler.reserve('https://c.com/')
+        assert len(scheduler) == 1
+
+    def test_neo_settings_read_on_booking(self, monkeypatch):
+        monkeypatch.setattr(Neo, 'COOLDOWN', 7)
+        monkeypatch.setattr(Neo, 'PARALLEL', 1)
+        scheduler = HostScheduler(lambda: Neo.COOLDOWN, lanes=lambda: Neo.PARALLEL)
+        scheduler.reserve('https://a.com/')
+        assert scheduler.reserve('https://a.com/x') == pytest.approx(7, abs=0.1)
+        assert (Neo.SCHEDULER.cooldown, Neo.SCHEDULER.lanes) == (7, 1)
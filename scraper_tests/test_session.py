@@ -0,0 +1,31 @@
+import pytest
+from scraper.session import SessionPool
+
+HOSTS = [f'https://site{i}.com/' for i in range(3000)]
+
+class Tests:
+    def test_reuse_across_interleaved_hosts(self):
+        # every site's page batches interleave with all the other sites of the worker
+        pool = SessionPool()
+        for _ in range(4):
+            for href in HOSTS:
+                pool.get(href)
+        assert pool.stats()['hits'] == 9000 and pool.stats()['misses'] == 3000 and pool.evictions == 0
+        pool.close()
+
+    def test_evicts_least_recently_used(self):
+        pool = SessionPool(size=2)
+        first = pool.get('https://a.com/x')
+        pool.get('https://b.com/')
+        assert pool.get('https://A.com/y') is first
+        # b.com is least recently used
+        pool.get('https://c.com/')
+        assert (pool.hits, pool.misses, pool.evictions, len(pool)) == (1, 3, 1, 2)
+        pool.get('https://b.com/')
+        assert pool.misses == 4
+
+    def test_evicts_idle(self):
+        pool = SessionPool(idle=0)
+        pool.get('https://a.com/')
+        pool.get('https://b.com/')
+        assert (pool.misses, pool.evictions, len(pool)) == (2, 1, 1)
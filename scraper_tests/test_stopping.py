@@ -0,0 +1,43 @@
+import pytest
+from scraper import Neo
+from scraper.stopping import StopPolicy
+
+class Tests:
+    def test_zero_streak(self):
+        policy = StopPolicy(zeros=3, stale=None)
+        site = policy.track()
+        for score in [0, 0, 12, 0, 0]:
+            site.page(score)
+        assert not site.done
+        site.page(0)
+        assert site.reason == 'zeros'
+        site.stop(remaining=9)
+        assert policy.stats() == {'sites': 1, 'stopped': 1, 'stopped_zeros': 1, 'stopped_stale': 0, 'fetches_saved': 9}
+
+    def test_stale_findings(self):
+        policy = StopPolicy(zeros=None, stale=2)
+        site = policy.track()
+        site.page(10, {'20% off'})
+        # same finding on another page isn't new
+        site.page(10, {'20% off'})
+        site.page(12, {'20% off', 'free delivery'})
+        assert not site.done
+        site.page(12, {'free delivery'})
+        site.page(10, {'20% off'})
+        assert site.reason == 'stale'
+        # restored tracker carries streaks & findings, and isn't counted as another site
+        restored = policy.track(site.state())
+        restored.page(12, {'free delivery'})
+        assert restored.stale == 3 and restored.found == {'20% off', 'free delivery'}
+        assert policy.sites == 1
+
+    def test_neo_stops_early(self, monkeypatch):
+        monkeypatch.setattr(Neo, 'STOP', StopPolicy(zeros=2, stale=None))
+        scraper = Neo('https://site.com')
+        scraper.frontier.push(['https://site.com/'] + [f'https://site.com/{i}' for i in range(10)], 1)
+        scraper.digest('https://site.com/', '<html><body><p>About us</p></body></html>')
+        assert not scraper.exhausted()
+        scraper.digest('https://site.com/1', '<html><body><p>Contact</p></body></html>')
+        assert scraper.exhausted()
+        assert Neo.STOP.stats()['fetches_saved'] == 11
+        assert scraper.state()['yields']['zeros'] == 2
@@ -0,0 +1,25 @@
+import pytest
+from scraper import Neo
+from scraper.urls import canonicalize
+
+class Tests:
+    def test_same_page_spellings(self):
+        base = 'https://Site.com/shop/'
+        for href in ['/menu', '/menu/', '/menu?utm_source=x&utm_medium=mail', 'https://site.com/menu', '/menu#top', '../menu', 'https://SITE.com:443/menu']:
+            assert canonicalize(href, base) == 'https://site.com/menu'
+
+    def test_keeps_what_changes_the_page(self):
+        assert canonicalize('/menu?b=2&fbclid=x&a=1', 'https://site.com') == 'https://site.com/menu?a=1&b=2'
+        assert canonicalize('menu.html', 'https://site.com/shop/') == 'https://site.com/shop/menu.html'
+        assert canonicalize('http://site.com:8080/') == 'http://site.com:8080/'
+        assert canonicalize('https://site.com') == 'https://site.com/'
+
+    def test_neo_queues_one_spelling(self):
+        scraper = Neo('https://site.com/')
+        links = ''.join(f'<a href="{href}">x</a>' for href in ['/menu', '/menu/', '/menu?utm_source=x', 'https://site.com/menu', '/menu#top'])
+        assert scraper.digest('https://site.com/', f'<p>Menu</p>{links}') == {'https://site.com/menu'}
+
+    def test_neo_stays_on_site(self):
+        scraper = Neo('https://www.shop.com/')
+        links = ''.join(f'<a href="{href}">x</a>' for href in ['//evil.example.net/deals', '//www.shop.com/deals', '/offers'])
+        assert scraper.digest('https://www.shop.com/', f'<p>Shop</p>{links}') == {'https://www.shop.com/deals', 'https://www.shop.com/offers'}
@@ -0,0 +1,80 @@
+"""Compares the Eventlet-backed Neo with AsyncNeo on the same list of sites.
+
+Each mode crawls every site in the input file with as many sites in flight as allowed
+and reports wall time and sites per second. Run each mode from the repo root
+(Eventlet has to monkey-patch before anything else is imported, so modes run in separate processes):
+$ python -m speed_tests.async_bench eventlet
+$ python -m speed_tests.async_bench asyncio
+
+Optional args are input file and concurrency:
+$ python -m speed_tests.async_bench asyncio sites_list/debug.csv 20000
+
+No database is touched, only scraping & Trinity scoring are timed.
+"""
+
+import sys
+import csv
+import time
+
+
+def load(file):
+    """Reads site urls from input csv, skipping rows with missing urls."""
+    with open(file, encoding='utf-8-sig') as f:
+        return [row['url'] for row in csv.DictReader(f) if row['url']]
+
+
+def run_eventlet(urls, concurrency):
+    import eventlet
+    eventlet.monkey_patch()
+    from scraper import Neo
+
+    def crawl(url):
+        scraper = Neo(url)
+        try:
+            scraper.execute()
+        except Exception as e:
+            print(f"Exception encountered for {url}: {e.args}")
+        return len(scraper.results['links'])
+
+    pool = eventlet.GreenPool(concurrency)
+    return sum(pool.imap(crawl, urls))
+
+
+def run_asyncio(urls, concurrency):
+    import asyncio
+    import aiohttp
+    from scraper.aio import AsyncNeo, AsyncPipeline
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=AsyncPipeline.CONNECTIONS,
+            limit_per_host=AsyncPipeline.CONNECTIONS_PER_HOST)
+
+        async def crawl(url, session):
+            async with limit:
+                scraper = AsyncNeo(url, session)
+                try:
+                    await scraper.execute()
+                except Exception as e:
+                    print(f"Exception encountered for {url}: {e.args}")
+                return len(scraper.results['links'])
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return sum(await asyncio.gather(*(crawl(url, session) for url in urls)))
+
+    return asyncio.run(main())
+
+
+if __name__ == '__main__':
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'asyncio'
+    file = sys.argv[2] if len(sys.argv) > 2 else 'sites_list/debug.csv'
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    urls = load(file)
+    start = time.perf_counter()
+    if mode == 'eventlet':
+        scored = run_eventlet(urls, concurrency)
+    else:
+        scored = run_asyncio(urls, concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"\nMode: {mode}\nSites: {len(urls)}\nScored pages: {scored}\n"
+        f"Runtime: {elapsed:.1f} secs ({len(urls)/elapsed:.2f} sites/sec)")
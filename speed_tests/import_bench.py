@@ -0,0 +1,39 @@
+"""Measures how long a fresh Python process takes to import each Celery app module,
+which is most of a worker's cold start before it can take a task.
+
+Run from the repo root (BROKER_URL & DB_URI must be set in .env or the environment):
+$ python -m speed_tests.import_bench
+
+For a per-module breakdown of a single import use:
+$ python -X importtime -c "import production"
+"""
+
+import subprocess
+import sys
+
+# celery app itself is the baseline a worker can't avoid
+MODULES = ['celery.app', 'production', 'pipeline_test', 'data_generator']
+
+CODE = """
+import time
+start = time.perf_counter()
+import {module}
+secs = round(time.perf_counter() - start, 3)
+try:
+    import resource
+    print(secs, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+# resource is unix only
+except ImportError:
+    print(secs, '-')
+"""
+
+
+if __name__ == '__main__':
+    print(f"{'module':<16}{'import secs':>12}{'max RSS (KB)':>14}")
+    for module in MODULES:
+        out = subprocess.run([sys.executable, '-c', CODE.format(module=module)], capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"{module:<16}failed: {out.stderr.strip().splitlines()[-1]}")
+            continue
+        secs, rss = out.stdout.split()[-2:]
+        print(f"{module:<16}{secs:>12}{rss:>14}")
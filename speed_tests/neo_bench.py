@@ -0,0 +1,221 @@
+"""End-to-end Neo throughput against the local site farm (real HTTP, HTML parsing & Trinity, no internet).
+
+Starts speed_tests/site_farm.py in a child process (so its CPU isn't counted), crawls every farm site
+with Neo under Eventlet or AsyncNeo under asyncio, then reports pages/sec, p50/p99 request latency
+(from the end of the host cooldown to the page being returned) and CPU secs per page.
+Run from the repo root:
+$ python -m speed_tests.neo_bench eventlet
+$ python -m speed_tests.neo_bench asyncio --latency 0.05 --errors 0.02 --stalls 0.01 --stall 3
+
+--pipeline saves results through Pipeline.etl / AsyncPipeline into a temporary SQLite database,
+so database writes are timed too. --stop ZEROS STALE turns on early stopping (see scraper.stopping),
+to compare the score captured with a run without it. Any site_farm option (--pages, --page-bytes, --sites, ...) is
+passed on to the farm. Cooldown, timeout & 429 rest are shortened so a run takes seconds, not minutes.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def arguments():
+    """Returns (bench options, site_farm args)."""
+
+    parser = argparse.ArgumentParser(description='Benchmark Neo against the local site farm.')
+    parser.add_argument('mode', nargs='?', default='eventlet', choices=['eventlet', 'asyncio'])
+    parser.add_argument('--concurrency', type=int, default=1000, help='max sites in flight')
+    parser.add_argument('--cooldown', type=float, default=0.1, help='secs between requests to a host')
+    parser.add_argument('--timeout', type=float, default=2, help='request timeout in secs')
+    parser.add_argument('--no-spam', type=float, default=1, help='secs a host rests after a 429')
+    parser.add_argument('--pipeline', action='store_true', help='save results to a temporary database')
+    parser.add_argument('--stop', type=int, nargs=2, metavar=('ZEROS', 'STALE'), help='stop sites early with StopPolicy(zeros, stale)')
+    return parser.parse_known_args()
+
+
+def start_farm(args):
+    """Starts site farm in a child process & returns (process, rows)."""
+
+    farm = subprocess.Popen([sys.executable, '-m', 'speed_tests.site_farm'] + args, stdout=subprocess.PIPE, text=True)
+    line = farm.stdout.readline()
+    if not line:
+        raise RuntimeError('Site farm failed to start')
+    return farm, json.loads(line)
+
+
+def percentile(values, q):
+    """Returns q-th percentile (0 to 100) of values by nearest rank."""
+
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def timed(scraper, log, scores):
+    """Returns subclass of a Neo-like scraper that logs (secs, outcome) of every fetch & the score of every scored page.
+    Clock starts once the host's cooldown is over (see Clock)."""
+
+    import asyncio
+    from scraper import RetryLater
+
+    class Timed(scraper):
+        def digest(self, href, html):
+            before = len(self.results['scores'])
+            hrefs = super().digest(href, html)
+            scores.extend(self.results['scores'][before:])
+            return hrefs
+
+        def __record(self, href, html, start):
+            log.append((time.perf_counter() - Clock.started.pop(href, start), 'empty' if html is None else 'ok'))
+
+        if asyncio.iscoroutinefunction(scraper.fetch):
+            async def fetch(self, href):
+                start = time.perf_counter()
+                try:
+                    html = await super().fetch(href)
+                except Exception as e:
+                    # 429s count as skipped, as when fetch returned None for them
+                    outcome = 'empty' if isinstance(e, RetryLater) else 'error'
+                    log.append((time.perf_counter() - Clock.started.pop(href, start), outcome))
+                    raise
+                self.__record(href, html, start)
+                return html
+        else:
+            def fetch(self, href):
+                start = time.perf_counter()
+                try:
+                    html = super().fetch(href)
+                except Exception as e:
+                    # 429s count as skipped, as when fetch returned None for them
+                    outcome = 'empty' if isinstance(e, RetryLater) else 'error'
+                    log.append((time.perf_counter() - Clock.started.pop(href, start), outcome))
+                    raise
+                self.__record(href, html, start)
+                return html
+
+    return Timed
+
+
+class Clock:
+    """Marks when each link's cooldown ends, so latency excludes time spent waiting for the host."""
+
+    started = {}
+
+    @classmethod
+    def scheduler(cls, base):
+        class Scheduler(base):
+            def reserve(self, href):
+                delay = super().reserve(href)
+                cls.started[href] = time.perf_counter() + delay
+                return delay
+        return Scheduler
+
+
+def setup(options):
+    """Sets Neo's politeness & timeouts for the bench and points Pipeline at a temporary database."""
+
+    if options.pipeline:
+        folder = tempfile.mkdtemp()
+        os.environ['DB_URI'] = f"sqlite:///{os.path.join(folder, 'bench.db')}"
+        os.environ['CHECKPOINTS'] = os.path.join(folder, 'checkpoints.db')
+    from scraper import Neo
+    from scraper.politeness import HostScheduler
+    from scraper.stopping import StopPolicy
+    if options.stop:
+        Neo.STOP = StopPolicy(*options.stop)
+    Neo.COOLDOWN = options.cooldown
+    # same booking as Neo's own scheduler, marking when each cooldown ends
+    Neo.SCHEDULER = Clock.scheduler(HostScheduler)(lambda: Neo.COOLDOWN, lanes=lambda: Neo.PARALLEL)
+    Neo.TIMEOUT = options.timeout
+    Neo.NO_SPAM = options.no_spam
+
+
+def run_eventlet(rows, options, log, scores):
+    import eventlet
+    eventlet.monkey_patch()
+    setup(options)
+    from scraper import Neo, Pipeline
+    scraper = timed(Neo, log, scores)
+    pipe = Pipeline() if options.pipeline else None
+
+    def crawl(row):
+        try:
+            if pipe is None:
+                scraper(row['url']).execute()
+            else:
+                pipe.etl(row['url'], id=row['id'], name=row['name'], scraper=scraper)
+        except Exception as e:
+            print(f"Exception encountered for {row['url']}: {e.args}")
+
+    pool = eventlet.GreenPool(options.concurrency)
+    for _ in pool.imap(crawl, rows):
+        pass
+    if pipe is not None:
+        pipe.flush()
+
+
+def run_asyncio(rows, options, log, scores):
+    import asyncio
+    import aiohttp
+    setup(options)
+    from scraper.aio import AsyncNeo, AsyncPipeline
+    scraper = timed(AsyncNeo, log, scores)
+
+    if options.pipeline:
+        class Pipe(AsyncPipeline):
+            async def etl(self, link, session, id=0, name='website', scraper=scraper):
+                return await super().etl(link, session, id, name, scraper)
+        Pipe().start(rows, options.concurrency)
+        return
+
+    async def main():
+        limit = asyncio.Semaphore(options.concurrency)
+        connector = aiohttp.TCPConnector(limit=AsyncPipeline.CONNECTIONS,
+            limit_per_host=AsyncPipeline.CONNECTIONS_PER_HOST)
+
+        async def crawl(row, session):
+            async with limit:
+                try:
+                    await scraper(row['url'], session).execute()
+                except Exception as e:
+                    print(f"Exception encountered for {row['url']}: {e.args}")
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(crawl(row, session) for row in rows))
+
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    options, farm_args = arguments()
+    farm, rows = start_farm(farm_args)
+    log = []
+    scores = []
+    try:
+        cpu = time.process_time()
+        start = time.perf_counter()
+        if options.mode == 'eventlet':
+            run_eventlet(rows, options, log, scores)
+        else:
+            run_asyncio(rows, options, log, scores)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+    finally:
+        farm.terminate()
+        farm.wait()
+    latencies = [secs for secs, _ in log]
+    outcomes = {outcome: sum(1 for _, o in log if o == outcome) for outcome in ('ok', 'empty', 'error')}
+    pages = max(outcomes['ok'], 1)
+    print(f"\nMode: {options.mode}{' + pipeline' if options.pipeline else ''}\nSites: {len(rows)}\n"
+        f"Fetches: {len(log)} ({outcomes['ok']} pages, {outcomes['empty']} skipped/429, {outcomes['error']} errors)\n"
+        f"Runtime: {elapsed:.2f} secs ({outcomes['ok']/elapsed:.1f} pages/sec)\n"
+        f"Latency: p50 {percentile(latencies, 50)*1000:.1f} ms, p99 {percentile(latencies, 99)*1000:.1f} ms\n"
+        f"CPU: {cpu:.2f} secs ({cpu/pages*1000:.2f} ms/page)\n"
+        f"Scores: {len(scores)} pages scored, total {sum(scores)}")
+    from scraper import Neo
+    if Neo.STOP is not None:
+        print(f"Early stopping: {Neo.STOP.stats()}")
@@ -0,0 +1,134 @@
+"""Throughput of each regex detector & Trinity, checked against a stored baseline.
+
+regex_tests only checks what the patterns match. A pattern edit that backtracks badly (e.g. a
+nested .{0,20} around 'free') passes those tests and quietly slows every page in production.
+This times find_discounts, find_freebies, find_subscriptions and Trinity on the stored page text
+of sites_data/initial.csv plus adversarial inputs (long runs of 'free', '%', '£' etc.), and
+exits with status 1 if any throughput falls more than `--threshold` below the baseline.
+
+Throughput is divided by that of a plain \\w+ scan of the corpus, so baselines recorded on one
+machine still hold on a faster or slower one. Run from the repo root:
+$ python -m speed_tests.regex_bench
+After an intended change (or to record a first baseline):
+$ python -m speed_tests.regex_bench --update
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import pandas as pd
+from regex import find_discounts, find_freebies, find_subscriptions, Trinity
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'regex_baseline.json')
+
+DETECTORS = {
+    'find_discounts': find_discounts,
+    'find_freebies': find_freebies,
+    'find_subscriptions': find_subscriptions,
+    'Trinity': lambda text: Trinity(text).score(),
+}
+
+# ~100 KB of each: runs of anchors make every offset a match candidate
+ADVERSARIAL = {
+    'free_run': 'free ' * 20000,
+    'free_nospace': 'free' * 25000,
+    'percent_run': '%' * 100000,
+    'percent_digits': '10% ' * 25000,
+    'pound_run': '£' * 100000,
+    'pound_digits': '£1 ' * 33000,
+    'gift_card_run': 'gift card ' * 10000,
+    'subscri_run': 'subscri' * 14000,
+    'mixed_anchors': '£5 10% free voucher membership ' * 3300,
+    'no_anchors': 'lorem ipsum dolor sit amet ' * 3700,
+}
+
+
+def inputs():
+    """Returns dict of input name -> list of texts."""
+
+    df = pd.read_csv('sites_data/initial.csv')
+    texts = {'corpus': [str(text) for text in df['content']]}
+    texts.update({name: [text] for name, text in ADVERSARIAL.items()})
+    return texts
+
+
+def best(func, texts, repeat, secs=0.05):
+    """Returns fastest of `repeat` timings (secs) of one pass of func over all texts.
+    Short passes are looped until a timing takes at least `secs`, so timer noise doesn't dominate."""
+
+    def run(loops):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for text in texts:
+                func(text)
+        return time.perf_counter() - start
+
+    loops = 1
+    times = [run(loops)]
+    while times[0] < secs:
+        loops *= 2
+        times = [run(loops)]
+    times += [run(loops) for _ in range(repeat - 1)]
+    return min(times) / loops
+
+
+def measure(repeat=3):
+    """Returns dict of 'detector/input' -> throughput relative to a \\w+ scan of the corpus."""
+
+    texts = inputs()
+    corpus = texts['corpus']
+    words = re.compile(r"\w+").findall
+    results = {}
+    for input, texts in texts.items():
+        size = sum(len(text) for text in texts)
+        for name, func in DETECTORS.items():
+            # reference is timed right next to each benchmark, so a busy machine slows both alike
+            reference = sum(len(text) for text in corpus) / best(words, corpus, repeat)
+            throughput = size / best(func, texts, repeat)
+            results[f'{name}/{input}'] = {'relative': throughput / reference, 'chars_per_sec': throughput}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints each result against baseline & returns names that regressed past threshold."""
+
+    regressed = []
+    print(f"{'benchmark':<38}{'MB/s':>9}{'relative':>10}{'baseline':>10}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<38}{result['chars_per_sec']/1e6:>9.2f}{result['relative']:>10.3f}"
+        if name in baseline:
+            change = result['relative'] / baseline[name] - 1
+            line += f"{baseline[name]:>10.3f}{change:>+9.0%}"
+            if change < -threshold:
+                regressed.append(name)
+                line += '  REGRESSED'
+        print(line)
+    return regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark regex detectors against stored baseline.')
+    parser.add_argument('--update', action='store_true', help='write results as new baseline')
+    parser.add_argument('--threshold', type=float, default=0.5, help='max allowed drop in relative throughput (backtracking bugs cost far more than timing noise)')
+    parser.add_argument('--repeat', type=int, default=3, help='timings per benchmark (fastest is kept)')
+    options = parser.parse_args()
+
+    results = measure(options.repeat)
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    regressed = compare(results, baseline, options.threshold)
+    if options.update:
+        with open(BASELINE, 'w') as f:
+            json.dump({name: round(result['relative'], 4) for name, result in results.items()}, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {BASELINE}")
+    elif regressed:
+        print(f"\n{len(regressed)} benchmarks more than {options.threshold:.0%} slower than baseline: {', '.join(regressed)}")
+        sys.exit(1)
+    elif not baseline:
+        print("\nNo baseline yet, record one with --update")
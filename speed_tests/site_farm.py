@@ -0,0 +1,221 @@
+"""Local stand-in for the web: synthetic multi-page sites served from 127.0.0.1.
+
+Each row of sites_data/initial.csv becomes a site of `pages` pages on its own port (so every site
+is a separate host to Neo's per-host scheduler & session pool). Pages carry the row's stored page
+text, split across the site's pages and padded to `page_bytes`, with a nav bar linking every page
+(plus a few links Neo should filter out). Responses can be slowed, answered with 429 or stalled
+past a scraper's timeout at given rates, so benchmarks see the same kinds of failures as production.
+
+Serve until interrupted (prints a JSON manifest of sites once listening):
+$ python -m speed_tests.site_farm --latency 0.05 --errors 0.02 --stalls 0.01
+
+In code:
+    with SiteFarm(latency=0.05) as farm:
+        for row in farm.rows:
+            Neo(row['url']).execute()
+"""
+
+import argparse
+import ast
+import csv
+import html
+import json
+import random
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# filler for pages shorter than page_bytes (no offer keywords, so scores only come from real content)
+FILLER = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore. '
+
+
+def load(file):
+    """Returns rows of input csv with 'content' parsed into a list of page texts."""
+
+    # stored page text can be far longer than csv's default field limit
+    csv.field_size_limit(2**31 - 1)
+    with open(file, encoding='utf-8-sig') as f:
+        rows = [row for row in csv.DictReader(f) if row['url']]
+    for row in rows:
+        try:
+            row['content'] = [str(text) for text in ast.literal_eval(row['content'])]
+        except (ValueError, SyntaxError):
+            row['content'] = [row['content']]
+    return rows
+
+
+def build(row, pages=16, page_bytes=None):
+    """Returns dict of path -> HTML bytes for a synthetic site made from a csv row.
+
+    Args:
+        row (dict): Row with 'name' & 'content' keys.
+        pages (int, optional): Number of pages including homepage. Default is 16.
+        page_bytes (int, optional): Min size of each page, padded with FILLER. Default is None (no padding).
+
+    Returns:
+        dict: Path -> page HTML.
+    """
+
+    paths = ['/'] + [f'/p{i}.html' for i in range(1, pages)]
+    text = ' '.join(row['content'])
+    # spread text over the site's pages (stored rows hold anything from 1 to many pages)
+    size = len(text) // pages + 1
+    nav = ''.join(f'<a href="{path}">Page {i}</a>' for i, path in enumerate(paths))
+    nav += '<a href="/terms">Terms</a><a href="/login">Login</a><a href="https://elsewhere.example/">Partner</a>'
+    site = {}
+    for i, path in enumerate(paths):
+        body = f'<p>{html.escape(text[i * size:(i + 1) * size])}</p>'
+        page = f'<html><head><title>{html.escape(row["name"])}</title></head><body><nav>{nav}</nav><main>{body}</main>'
+        if page_bytes:
+            page += '<p>' + FILLER * max(0, (page_bytes - len(page)) // len(FILLER) + 1) + '</p>'
+        site[path] = (page + '</body></html>').encode('utf-8')
+    return site
+
+
+class SiteFarm:
+    """Serves synthetic sites on local ports in background threads.
+
+    Use:
+        farm = SiteFarm('sites_data/initial.csv', latency=0.05, errors=0.02)
+        farm.start()
+        urls = [row['url'] for row in farm.rows]
+        farm.stop()
+
+    Args:
+        file (str, optional): Input csv with 'id', 'name', 'url' & 'content' columns. Default is sites_data/initial.csv.
+        pages (int, optional): Pages per site including homepage. Default is 16.
+        page_bytes (int, optional): Min page size in bytes. Default is None (content only).
+        latency (float, optional): Secs before each response. Default is 0.
+        errors (float, optional): Share of responses that are 429s. Default is 0.
+        stalls (float, optional): Share of responses held for `stall` secs (past a scraper's timeout). Default is 0.
+        stall (float, optional): Secs a stalled response is held. Default is 10.
+        sites (int, optional): Max number of sites to serve. Default is None (all rows).
+        seed (int, optional): Seed for error & stall draws. Default is 0.
+
+    Attributes:
+        rows (list): Dicts with 'id', 'name' & 'url' of each served site.
+        served (int): Number of responses sent.
+
+    Methods:
+        draw: Draws fault of next response.
+        start: Starts serving every site.
+        stop: Stops all servers.
+    """
+
+    def __init__(self, file='sites_data/initial.csv', pages=16, page_bytes=None, latency=0, errors=0, stalls=0, stall=10, sites=None, seed=0):
+        self.latency = latency
+        self.errors = errors
+        self.stalls = stalls
+        self.stall = stall
+        self.rows = []
+        self.served = 0
+        self.__sites = [(row, build(row, pages, page_bytes)) for row in load(file)[:sites]]
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__servers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def draw(self):
+        """Returns 'error', 'stall' or None for the next response."""
+
+        with self.__lock:
+            self.served += 1
+            draw = self.__random.random()
+        if draw < self.errors:
+            return 'error'
+        elif draw < self.errors + self.stalls:
+            return 'stall'
+        return None
+
+    def __handler(self, site):
+        farm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive like real servers, so session reuse shows up in benchmarks
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                fault = farm.draw()
+                time.sleep(farm.stall if fault == 'stall' else farm.latency)
+                page = site.get(self.path)
+                if fault == 'error':
+                    self.__send(429, b'Too Many Requests')
+                elif page is None:
+                    self.__send(404, b'Not Found')
+                else:
+                    self.__send(200, page)
+
+            def __send(self, status, body):
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                # scraper gave up on a stalled response
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Starts one server per site on a free local port & fills rows."""
+
+        for row, site in self.__sites:
+            server = ThreadingHTTPServer(('127.0.0.1', 0), self.__handler(site))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.__servers.append(server)
+            self.rows.append({'id': int(row['id']), 'name': row['name'], 'url': f'http://127.0.0.1:{server.server_port}/'})
+
+    def stop(self):
+        """Stops all servers."""
+
+        for server in self.__servers:
+            server.shutdown()
+            server.server_close()
+        self.__servers = []
+
+
+def arguments(args=None):
+    """Parses farm options (shared with neo_bench)."""
+
+    parser = argparse.ArgumentParser(description='Serve synthetic sites locally.')
+    parser.add_argument('--file', default='sites_data/initial.csv', help='input csv with content column')
+    parser.add_argument('--pages', type=int, default=16, help='pages per site including homepage')
+    parser.add_argument('--page-bytes', type=int, default=None, help='min page size in bytes')
+    parser.add_argument('--latency', type=float, default=0.0, help='secs before each response')
+    parser.add_argument('--errors', type=float, default=0.0, help='share of 429 responses')
+    parser.add_argument('--stalls', type=float, default=0.0, help='share of responses stalled past timeout')
+    parser.add_argument('--stall', type=float, default=10.0, help='secs a stalled response is held')
+    parser.add_argument('--sites', type=int, default=None, help='max number of sites')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_known_args(args)[0]
+
+
+def farm(options):
+    """Returns SiteFarm for parsed options."""
+
+    return SiteFarm(options.file, options.pages, options.page_bytes, options.latency, options.errors,
+        options.stalls, options.stall, options.sites, options.seed)
+
+
+if __name__ == '__main__':
+    with farm(arguments()) as sites:
+        # first line of output lets a parent process find the sites
+        print(json.dumps(sites.rows), flush=True)
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print(f"Served {sites.served} responses", file=sys.stderr)